@@ -0,0 +1,170 @@
+"""Private key -> hash160 throughput of every installed key derivation stack.
+
+Each key_backends backend (coincurve, cryptography, bitcointx, ecdsa,
+pybitcointools and the in-repo secp256k1 module) is checked against the
+in-repo arithmetic, then timed on one core and on every available core. The RIPEMD-160 paths
+(hashlib, an openssl subprocess per hash as verify_final.py used to run, the
+in-repo ripemd160 module's pure-Python fallback and pybitcointools') are
+timed the same way over SHA-256 digests.
+Results are printed and written to a JSON file so the fastest stack can be
+picked per machine.
+"""
+import hashlib
+import json
+import multiprocessing as mp
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from scan_ledger import PUZZLE_67_LOW
+from secp256k1 import point_multiply, serialize_pubkey
+from key_backends import BACKENDS, load_backend
+from ripemd160 import ripemd160_python
+from puzzle67_scanner import available_cores
+
+BENCHMARK_FILE = "benchmark_backends.json"
+MEASURE_SECONDS = 2.0  # Per backend, per core count
+CHUNK = 16  # Keys between clock reads
+START_KEY = PUZZLE_67_LOW
+
+def _ripemd160_hashlib():
+    hashlib.new('ripemd160')  # Raises on OpenSSL 3 builds without the legacy provider
+    return lambda data: hashlib.new('ripemd160', data).digest()
+
+def _ripemd160_openssl():
+    def ripemd160(data):
+        # One openssl process per hash, as verify_final.py used to do
+        proc = subprocess.Popen(['openssl', 'dgst', '-ripemd160', '-binary'], stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return proc.communicate(data)[0]
+    return ripemd160
+
+def _ripemd160_pure_python():
+    return ripemd160_python
+
+def _ripemd160_pybitcointools():
+    from bitcoin.ripemd import RIPEMD160
+    return lambda data: RIPEMD160(data).digest()
+
+# name -> factory returning a bytes -> RIPEMD-160 digest function
+HASHES = {
+    "hashlib": _ripemd160_hashlib,
+    "openssl subprocess": _ripemd160_openssl,
+    "pure Python": _ripemd160_pure_python,
+    "pybitcointools": _ripemd160_pybitcointools,
+}
+
+def backend_job(name, start_key):
+    """hash160 of the compressed pubkey of consecutive keys"""
+    backend = load_backend(name)
+    state = [start_key]
+
+    def job():
+        k = state[0]
+        state[0] = k + 1
+        return backend.hash160(k)
+    return job
+
+def hash_job(name, start_key):
+    """RIPEMD-160 of SHA-256 digests of consecutive compressed pubkeys"""
+    ripemd160 = HASHES[name]()
+    digests = [hashlib.sha256(serialize_pubkey(point_multiply(start_key + i))).digest() for i in range(CHUNK)]
+    state = [0]
+
+    def job():
+        i = state[0]
+        state[0] = i + 1
+        return ripemd160(digests[i % CHUNK])
+    return job
+
+def check(kind, name):
+    """None if the named backend or hash matches the in-repo reference, otherwise why it cannot be used"""
+    try:
+        if kind == "backend":
+            load_backend(name)  # Checks the derived pubkeys
+        else:
+            ripemd160 = HASHES[name]()
+            if ripemd160(b"abc").hex() != "8eb208f7e05d987a9b044a8e98c6b087f15a0bfc":
+                return "wrong RIPEMD-160 test vector"
+    except ImportError as e:
+        return f"not installed ({e.name})"
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    return None
+
+def _measure(args):
+    """Run one job for seconds; returns the number of calls"""
+    kind, name, start_key, seconds = args
+    job = (backend_job if kind == "backend" else hash_job)(name, start_key)
+    job()  # Warm up outside the timed loop
+    count = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        for _ in range(CHUNK):
+            job()
+        count += CHUNK
+    return count
+
+def measure(kind, name, pool=None, processes=1, seconds=MEASURE_SECONDS):
+    """Calls per second on one core, or summed over processes workers of pool"""
+    if pool is None:
+        start_time = time.perf_counter()
+        count = _measure((kind, name, START_KEY, seconds))
+        return count / (time.perf_counter() - start_time)
+
+    # Workers start on distinct keys; the rate is total calls over the wall time of the slowest
+    args = [(kind, name, START_KEY + (i << 32), seconds) for i in range(processes)]
+    start_time = time.perf_counter()
+    count = sum(pool.map(_measure, args, chunksize=1))
+    return count / (time.perf_counter() - start_time)
+
+def run_benchmark(seconds=MEASURE_SECONDS, processes=None):
+    """Benchmark every backend and hash path; returns the results as a dict"""
+    processes = processes or available_cores()
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'platform': platform.platform(),
+            'processor': platform.processor() or platform.machine(),
+            'python': f"{platform.python_implementation()} {platform.python_version()}",
+            'cores': processes,
+        },
+        'start_key': hex(START_KEY),
+        'seconds': seconds,
+        'backends': {},
+        'hashes': {},
+        'fastest': {},
+    }
+
+    with mp.Pool(processes) as pool:
+        for kind, names, unit in (("backend", BACKENDS, "keys/s"), ("hash", HASHES, "hashes/s")):
+            section = results['backends' if kind == "backend" else 'hashes']
+            print(f"\n{'Backend' if kind == 'backend' else 'RIPEMD-160'} ({unit}; all cores = {processes})")
+            print(f"{'='*60}")
+            print(f"{'':22} | {'1 core':>14} | {'all cores':>14}")
+            print(f"{'-'*60}")
+            for name in names:
+                error = check(kind, name)
+                if error:
+                    section[name] = {'available': False, 'error': error}
+                    print(f"{name:22} | {error}")
+                    continue
+                single = measure(kind, name, seconds=seconds)
+                parallel = measure(kind, name, pool, processes, seconds)
+                section[name] = {'available': True, 'single_core': round(single, 1), 'all_cores': round(parallel, 1)}
+                print(f"{name:22} | {single:>14,.0f} | {parallel:>14,.0f}")
+
+            available = [name for name, result in section.items() if result['available']]
+            if available:
+                results['fastest'][kind] = max(available, key=lambda name: section[name]['all_cores'])
+    return results
+
+if __name__ == '__main__':
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else MEASURE_SECONDS
+    output = sys.argv[2] if len(sys.argv) > 2 else BENCHMARK_FILE
+    results = run_benchmark(seconds)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"\nFastest: {results['fastest']}")
+    print(f"Results written to {output}")
@@ -0,0 +1,40 @@
+import time
+import sys
+from ec_stepping import sequential_points, batch_points, offset_table
+from puzzle67_scanner import process_point, BASE_VALUE
+
+# Keys stepped per measurement
+KEYS_PER_RUN = 200_000
+BATCH_SIZES = [16, 64, 256, 1024, 4096, 16384]
+
+def measure(points, pipeline=False):
+    """Return keys per second for a point iterator"""
+    start_time = time.perf_counter()
+    count = 0
+    for private_key_int, point in points:
+        if pipeline:
+            process_point(private_key_int, point)
+        count += 1
+    return count / (time.perf_counter() - start_time)
+
+def run_benchmark(keys=KEYS_PER_RUN, batch_sizes=BATCH_SIZES, pipeline=False):
+    """Print keys/s for sequential stepping and each batch size"""
+    label = "EC + addresses" if pipeline else "EC only"
+    print(f"Stepping {keys:,} keys from 0x{BASE_VALUE:x} ({label})")
+    print(f"{'='*50}")
+    print(f"{'Batch size':>12} | {'Keys/s':>14}")
+    print(f"{'-'*50}")
+    
+    speed = measure(sequential_points(BASE_VALUE, keys), pipeline)
+    print(f"{'1 (no batch)':>12} | {speed:>14,.0f}")
+    
+    for batch_size in batch_sizes:
+        offset_table(batch_size)  # Build the i*G table outside the timed loop
+        speed = measure(batch_points(BASE_VALUE, keys, batch_size), pipeline)
+        print(f"{batch_size:>12,} | {speed:>14,.0f}")
+
+if __name__ == '__main__':
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else KEYS_PER_RUN
+    run_benchmark(keys)
+    print()
+    run_benchmark(keys // 10, pipeline=True)
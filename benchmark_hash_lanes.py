@@ -0,0 +1,49 @@
+import hashlib
+import sys
+import time
+from ec_stepping import batch_points
+from secp256k1 import serialize_pubkey
+from hash_lanes import sha256_batch, hash160_lanes
+from ripemd160 import ripemd160
+from puzzle67_scanner import BASE_VALUE
+
+# Pubkeys hashed per measurement and batch sizes handed to the NumPy lanes
+KEYS_PER_RUN = 65_536
+BATCH_SIZES = [64, 256, 1024, 4096, 16384, 65536]
+
+def measure(hash_batch, messages, batch_size):
+    """Return hashes per second when messages are hashed batch_size at a time"""
+    start_time = time.perf_counter()
+    for i in range(0, len(messages), batch_size):
+        hash_batch(messages[i:i + batch_size])
+    return len(messages) / (time.perf_counter() - start_time)
+
+def hashlib_batch(messages):
+    return [hashlib.sha256(message).digest() for message in messages]
+
+def hash160_batch(messages):
+    return [ripemd160(hashlib.sha256(message).digest()) for message in messages]
+
+def run_benchmark(keys=KEYS_PER_RUN, batch_sizes=BATCH_SIZES, compressed=True):
+    """Print SHA-256 and hash160 rates of per-call hashing and NumPy lanes for each batch size"""
+    messages = [serialize_pubkey(point, compressed) for _, point in batch_points(BASE_VALUE, keys)]
+    if sha256_batch(messages[:64]) != hashlib_batch(messages[:64]):
+        raise SystemExit("NumPy SHA-256 lanes disagree with hashlib")
+    if hash160_lanes(messages[:64]) != hash160_batch(messages[:64]):
+        raise SystemExit("NumPy hash160 lanes disagree with ripemd160(sha256())")
+
+    label = "33-byte compressed" if compressed else "65-byte uncompressed"
+    print(f"SHA-256 and hash160 of {keys:,} {label} pubkeys (hashes/s)")
+    print(f"{'='*84}")
+    print(f"{'Batch size':>12} | {'SHA-256 call':>14} | {'SHA-256 lanes':>14} | {'hash160 call':>14} | {'hash160 lanes':>14}")
+    print(f"{'-'*84}")
+    for batch_size in batch_sizes:
+        rates = [measure(hash_batch, messages, batch_size)
+                 for hash_batch in (hashlib_batch, sha256_batch, hash160_batch, hash160_lanes)]
+        print(f"{batch_size:>12,} | " + " | ".join(f"{rate:>14,.0f}" for rate in rates))
+
+if __name__ == '__main__':
+    keys = int(sys.argv[1]) if len(sys.argv) > 1 else KEYS_PER_RUN
+    run_benchmark(keys)
+    print()
+    run_benchmark(keys, compressed=False)
@@ -0,0 +1,133 @@
+"""Address <-> hash160 helpers for matching raw digests in the scanners.
+
+Hot loops compare RIPEMD160(SHA256(pubkey)) against the target's decoded
+hash160; Base58Check/bech32 encoding only happens when reporting a hit.
+"""
+import hashlib
+import base58
+from secp256k1 import serialize_pubkey
+from ripemd160 import ripemd160
+
+MAINNET_P2PKH_VERSION = 0x00
+BECH32_HRP = "bc"
+BECH32_CHARSET = "qpzry9x8gf2tvdw0s3jn54khce6mua7l"
+
+# Script types a search can derive; P2WPKH shares the compressed hash160. Encodings a search does
+# not select are neither serialized nor hashed (derive_hashes, KeyBackend.hash160s)
+P2PKH_COMPRESSED = "p2pkh_compressed"
+P2PKH_UNCOMPRESSED = "p2pkh_uncompressed"
+P2WPKH = "p2wpkh"
+ADDRESS_TYPES = (P2PKH_COMPRESSED, P2PKH_UNCOMPRESSED, P2WPKH)
+DEFAULT_ADDRESS_TYPES = (P2PKH_COMPRESSED, P2PKH_UNCOMPRESSED)
+
+# hash160 of batches: one hashlib call per pubkey, or SHA-256 and RIPEMD-160 of all pubkeys at once in
+# NumPy lanes (hash_lanes)
+SHA256_ENGINES = ("hashlib", "numpy")
+
+def hash160(data):
+    """RIPEMD160(SHA256(data))"""
+    return ripemd160(hashlib.sha256(data).digest())
+
+def _bech32_polymod(values):
+    generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
+    chk = 1
+    for value in values:
+        top = chk >> 25
+        chk = (chk & 0x1ffffff) << 5 ^ value
+        for i in range(5):
+            chk ^= generator[i] if ((top >> i) & 1) else 0
+    return chk
+
+def _bech32_hrp_expand(hrp):
+    return [ord(c) >> 5 for c in hrp] + [0] + [ord(c) & 31 for c in hrp]
+
+def _convert_bits(data, from_bits, to_bits, pad=True):
+    acc = 0
+    bits = 0
+    result = []
+    maxv = (1 << to_bits) - 1
+    for value in data:
+        acc = (acc << from_bits) | value
+        bits += from_bits
+        while bits >= to_bits:
+            bits -= to_bits
+            result.append((acc >> bits) & maxv)
+    if pad and bits:
+        result.append((acc << (to_bits - bits)) & maxv)
+    elif not pad and (bits >= from_bits or ((acc << (to_bits - bits)) & maxv)):
+        raise ValueError("Invalid bech32 padding")
+    return result
+
+def address_to_hash160(address):
+    """Decode a P2PKH (Base58Check) or P2WPKH (bech32) address to its 20-byte hash160"""
+    if address.lower().startswith(BECH32_HRP + "1"):
+        address = address.lower()
+        data = [BECH32_CHARSET.index(c) for c in address[len(BECH32_HRP) + 1:]]
+        if _bech32_polymod(_bech32_hrp_expand(BECH32_HRP) + data) != 1 or data[0] != 0:
+            raise ValueError(f"Not a P2WPKH address: {address}")
+        program = bytes(_convert_bits(data[1:-6], 5, 8, False))
+        if len(program) != 20:
+            raise ValueError(f"Not a P2WPKH address: {address}")
+        return program
+
+    payload = base58.b58decode_check(address)
+    if len(payload) != 21:
+        raise ValueError(f"Not a P2PKH address: {address}")
+    return payload[1:]
+
+def hash160_to_address(h160, version=MAINNET_P2PKH_VERSION):
+    """Encode a 20-byte hash160 as a Base58Check address"""
+    return base58.b58encode_check(bytes([version]) + h160).decode()
+
+def hash160_to_p2wpkh(h160):
+    """Encode a 20-byte hash160 as a bech32 P2WPKH address"""
+    data = [0] + _convert_bits(h160, 8, 5)
+    polymod = _bech32_polymod(_bech32_hrp_expand(BECH32_HRP) + data + [0] * 6) ^ 1
+    checksum = [(polymod >> 5 * (5 - i)) & 31 for i in range(6)]
+    return BECH32_HRP + "1" + "".join(BECH32_CHARSET[d] for d in data + checksum)
+
+def needs_compressed(address_types):
+    """Whether the compressed pubkey has to be serialized and hashed"""
+    return P2PKH_COMPRESSED in address_types or P2WPKH in address_types
+
+def needs_uncompressed(address_types):
+    """Whether the 65-byte uncompressed pubkey has to be serialized and hashed"""
+    return P2PKH_UNCOMPRESSED in address_types
+
+def derive_hashes(point, address_types=DEFAULT_ADDRESS_TYPES):
+    """Return (compressed hash160, uncompressed hash160) of a point, None for encodings not needed"""
+    hash_compressed = hash160(serialize_pubkey(point, True)) if needs_compressed(address_types) else None
+    hash_uncompressed = hash160(serialize_pubkey(point, False)) if needs_uncompressed(address_types) else None
+    return hash_compressed, hash_uncompressed
+
+def hash160_batch(data, sha256_engine="hashlib"):
+    """hash160 of every item of data (all the same length for the numpy engine)"""
+    if sha256_engine == "numpy":
+        from hash_lanes import hash160_lanes
+        return hash160_lanes(data)
+    if sha256_engine == "hashlib":
+        return [ripemd160(hashlib.sha256(item).digest()) for item in data]
+    raise ValueError(f"Unknown SHA-256 engine {sha256_engine!r}; choose from {', '.join(SHA256_ENGINES)}")
+
+def derive_hashes_batch(points, address_types=DEFAULT_ADDRESS_TYPES, sha256_engine="hashlib"):
+    """derive_hashes() of every point, hashing the pubkeys of each encoding as one batch"""
+    if needs_compressed(address_types):
+        hashes_compressed = hash160_batch([serialize_pubkey(point, True) for point in points], sha256_engine)
+    else:
+        hashes_compressed = [None] * len(points)
+    if needs_uncompressed(address_types):
+        hashes_uncompressed = hash160_batch([serialize_pubkey(point, False) for point in points], sha256_engine)
+    else:
+        hashes_uncompressed = [None] * len(points)
+    return list(zip(hashes_compressed, hashes_uncompressed))
+
+def encode_addresses(hash_compressed, hash_uncompressed, address_types=DEFAULT_ADDRESS_TYPES):
+    """Return {address_type: address} for every selected address type"""
+    addresses = {}
+    if P2PKH_COMPRESSED in address_types:
+        addresses[P2PKH_COMPRESSED] = hash160_to_address(hash_compressed)
+    if P2PKH_UNCOMPRESSED in address_types:
+        addresses[P2PKH_UNCOMPRESSED] = hash160_to_address(hash_uncompressed)
+    if P2WPKH in address_types:
+        addresses[P2WPKH] = hash160_to_p2wpkh(hash_compressed)
+    return addresses
@@ -0,0 +1,137 @@
+"""Memory-mapped coverage bitmap for scanning a keyspace in random block order.
+
+The keyspace is split into fixed-size blocks and each block has one bit in
+a bitmap file that is set once the block has been fully checked. The file
+is mmapped rather than loaded: [2^66, 2^67) in 2^24-key blocks needs 2^42
+bits (512 GiB), which only exists as a sparse file whose pages are
+allocated as blocks get visited.
+
+The file starts with a header of the keyspace, block size and a digest of
+the scope (target addresses and address types) it records. Opening a file
+written for other parameters raises ValueError instead of reading its bits
+as different key ranges. The default file name is keyed by the same values,
+the way checkpoints are, so runs for other targets get their own bitmap.
+
+A block being scanned is claimed with a POSIX byte-range lock on offset
+block of the file (locks may lie past the end of the file, so every block
+gets its own lock byte independent of the bitmap layout). The lock is dropped by the kernel if the process dies, so
+any number of processes and separate runs share one file without scanning
+a block twice and without stale claims.
+"""
+import fcntl
+import hashlib
+import json
+import mmap
+import os
+import random
+import struct
+from scan_ledger import PUZZLE_67_LOW, PUZZLE_67_HIGH
+
+BITMAP_PREFIX = "puzzle67_blocks"
+DEFAULT_BLOCK_BITS = 24  # 16,777,216 keys per block
+
+MAGIC = b"PZ67BMP1"
+HEADER = struct.Struct(">8s32s32sH32s")  # magic, low, high, block bits, scope digest
+
+def scope_digest(low, high, block_bits, scope=()):
+    """SHA-256 of the parameters a bitmap records"""
+    params = {'low': low, 'high': high, 'block_bits': block_bits, 'scope': list(scope)}
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).digest()
+
+def bitmap_path(low=PUZZLE_67_LOW, high=PUZZLE_67_HIGH, block_bits=DEFAULT_BLOCK_BITS, scope=()):
+    """Default bitmap file for these parameters"""
+    return f"{BITMAP_PREFIX}_{scope_digest(low, high, block_bits, scope).hex()[:16]}.bitmap"
+
+def block_range(low, high, block_bits, block):
+    """Return (first key, key count) of a block of [low, high); the last block may be short"""
+    first = low + (block << block_bits)
+    return first, min(1 << block_bits, high - first)
+
+def block_count(low, high, block_bits):
+    """Number of blocks covering [low, high)"""
+    return (high - low + (1 << block_bits) - 1) >> block_bits
+
+class BlockBitmap:
+    def __init__(self, path=None, low=PUZZLE_67_LOW, high=PUZZLE_67_HIGH, block_bits=DEFAULT_BLOCK_BITS, scope=()):
+        """Open (or create) the bitmap of [low, high) in 2^block_bits-key blocks for scope.
+
+        scope identifies what a finished block was checked for, e.g. the
+        ledger tags of the targets followed by the address types.
+        """
+        self.path = path or bitmap_path(low, high, block_bits, scope)
+        self.low = low
+        self.high = high
+        self.block_bits = block_bits
+        self.blocks = block_count(low, high, block_bits)
+        self.size = HEADER.size + (self.blocks + 7) // 8
+        header = HEADER.pack(MAGIC, low.to_bytes(32, 'big'), high.to_bytes(32, 'big'), block_bits,
+                             scope_digest(low, high, block_bits, scope))
+
+        # Every process opens its own descriptor: byte-range locks belong to the process
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            # flock() does not interact with the lockf() block claims; it only orders header setup
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+            try:
+                if os.fstat(self.fd).st_size == 0:
+                    os.write(self.fd, header)
+                elif os.pread(self.fd, HEADER.size, 0) != header:
+                    raise ValueError(f"{self.path} is a block bitmap for other parameters")
+                if os.fstat(self.fd).st_size < self.size:
+                    os.ftruncate(self.fd, self.size)  # Sparse: unvisited regions take no disk space
+            finally:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            self.map = mmap.mmap(self.fd, self.size)
+        except Exception:
+            os.close(self.fd)
+            raise
+        self.random = random.Random(os.urandom(16))
+
+    def block_range(self, block):
+        """Return (first key, key count) of a block"""
+        return block_range(self.low, self.high, self.block_bits, block)
+
+    def is_done(self, block):
+        return self.map[HEADER.size + (block >> 3)] >> (block & 7) & 1
+
+    def try_claim(self, block):
+        """Lock a block for scanning; False if it is done or another process holds it"""
+        try:
+            fcntl.lockf(self.fd, fcntl.LOCK_EX | fcntl.LOCK_NB, 1, block, os.SEEK_SET)
+        except OSError:
+            return False
+        if self.is_done(block):
+            self.release(block)
+            return False
+        return True
+
+    def claim_random(self, attempts=1000):
+        """Claim a random unvisited block; None once every block is done or claimed"""
+        for _ in range(attempts):
+            block = self.random.randrange(self.blocks)
+            if not self.is_done(block) and self.try_claim(block):
+                return block
+
+        # Random picks keep missing near the end: sweep for whatever is left
+        start = self.random.randrange(self.blocks)
+        for i in range(self.blocks):
+            block = (start + i) % self.blocks
+            if not self.is_done(block) and self.try_claim(block):
+                return block
+        return None
+
+    def complete(self, block):
+        """Mark a claimed block as fully checked and release it"""
+        offset = HEADER.size + (block >> 3)
+        self.map[offset] |= 1 << (block & 7)
+        page = offset - offset % mmap.PAGESIZE
+        self.map.flush(page, min(mmap.PAGESIZE, self.size - page))
+        self.release(block)
+
+    def release(self, block):
+        """Give a claimed block back unfinished"""
+        fcntl.lockf(self.fd, fcntl.LOCK_UN, 1, block, os.SEEK_SET)
+
+    def close(self):
+        self.map.close()
+        os.close(self.fd)
@@ -0,0 +1,50 @@
+"""Keyed bijective permutation of block indices for random-order scans.
+
+A cycle-walking Feistel network maps every index of [0, blocks) to a
+distinct block. Worker i of W takes permutation outputs i, i + W, i + 2W,
+..., so the scan order looks random but each worker's progress is a single
+counter and the whole order can be rebuilt from the key. No bitmap of
+visited blocks is needed.
+
+The network works on the smallest even bit width covering blocks; outputs
+past the end are fed back in (cycle walking) until they land in range,
+which takes fewer than four rounds of encryption on average.
+"""
+import hashlib
+
+FEISTEL_ROUNDS = 4
+
+class BlockPermutation:
+    def __init__(self, blocks, key, rounds=FEISTEL_ROUNDS):
+        """Permutation of [0, blocks) determined by key (any string)"""
+        self.blocks = blocks
+        self.half_bits = max(1, ((blocks - 1).bit_length() + 1) // 2)
+        self.mask = (1 << self.half_bits) - 1
+        self.round_keys = [hashlib.sha256(f"{key}:{r}".encode()).digest()[:16] for r in range(rounds)]
+
+    def __len__(self):
+        return self.blocks
+
+    def _round(self, round_key, value):
+        digest = hashlib.blake2b(value.to_bytes(8, 'little'), key=round_key, digest_size=8).digest()
+        return int.from_bytes(digest, 'little') & self.mask
+
+    def _encrypt(self, value):
+        left, right = value >> self.half_bits, value & self.mask
+        for round_key in self.round_keys:
+            left, right = right, left ^ self._round(round_key, right)
+        return left << self.half_bits | right
+
+    def __getitem__(self, index):
+        """Block visited at position index of the permuted order"""
+        if not 0 <= index < self.blocks:
+            raise IndexError(f"index {index} outside [0, {self.blocks})")
+        block = self._encrypt(index)
+        while block >= self.blocks:
+            block = self._encrypt(block)
+        return block
+
+    def worker_blocks(self, slot, workers, done=0):
+        """Yield (position, block) for worker slot of workers, skipping its first done outputs"""
+        for position in range(slot + done * workers, self.blocks, workers):
+            yield position, self[position]
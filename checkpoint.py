@@ -0,0 +1,57 @@
+"""Atomic on-disk checkpoints so long range scans can resume after Ctrl+C or a reboot.
+
+A checkpoint file is keyed by the scan parameters: a run with the same
+parameters finds and resumes the previous state, a run with different
+parameters starts fresh. Files are replaced atomically (write to a temp
+file, fsync, rename) so a crash mid-save never leaves a torn checkpoint.
+"""
+import hashlib
+import json
+import os
+import time
+
+CHECKPOINT_DIR = "checkpoints"
+DEFAULT_INTERVAL = 60  # Seconds between periodic saves
+
+class Checkpoint:
+    def __init__(self, name, params, directory=CHECKPOINT_DIR, interval=DEFAULT_INTERVAL):
+        self.name = name
+        self.params = json.loads(json.dumps(params))  # Normalized as it will read back (tuples -> lists)
+        self.interval = interval
+        key = hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()[:16]
+        self.path = os.path.join(directory, f"{name}_{key}.json")
+        self.last_save = time.time()
+
+    def load(self):
+        """Return the saved state for these parameters, or None"""
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('params') != self.params:
+            return None
+        return data.get('state')
+
+    def save(self, state):
+        """Atomically replace the checkpoint with state"""
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'params': self.params, 'state': state, 'saved_at': time.time()},
+                      f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.last_save = time.time()
+
+    def due(self):
+        """Whether the periodic save interval has elapsed"""
+        return time.time() - self.last_save >= self.interval
+
+    def age(self):
+        """Seconds since the last save"""
+        return time.time() - self.last_save
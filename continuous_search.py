@@ -1,18 +1,35 @@
-from bitcoin import *
 from decimal import Decimal, getcontext
-import time
 from datetime import datetime
+from checkpoint import Checkpoint
+from scan_ledger import ScanLedger
+from telemetry import Telemetry, SAMPLE_EVERY
+from bitcoin_address import encode_addresses, DEFAULT_ADDRESS_TYPES
+from key_backends import select_backend
+from metrics_server import serve_metrics, searcher_metrics
 
 # Set precision
 getcontext().prec = 1000
 
 class PuzzleSearch:
-    def __init__(self):
+    def __init__(self, address_types=DEFAULT_ADDRESS_TYPES):
+        self.address_types = address_types  # Script types to derive per key
         self.BASE_VALUE = 0x4a7711aa5  # Puzzle 58 value
         self.TARGET_ADDRESS = "1BY8GQbnueYofwSuFAT3USAhGjPrkxDdW9"
         self.CURRENT_GUESS = 0x16230cfcf80
         self.keys_checked = 0
-        self.start_time = time.time()
+        self.filter_passes = 0  # Keys that passed check_pattern_match
+        self.backend = select_backend()
+        self.telemetry = Telemetry("Continuous search")
+        self.checkpoint = None
+        self.position = None  # [range multiplier, direction, next offset] of the running search
+        self.ledger = ScanLedger(self.TARGET_ADDRESS, address_types, pattern='continuous_search')
+
+    def save_checkpoint(self):
+        """Persist the current search position"""
+        if self.checkpoint and self.position:
+            range_multiplier, direction, offset = self.position
+            self.checkpoint.save({'range_multiplier': range_multiplier, 'direction': direction,
+                                  'offset': offset, 'keys_checked': self.keys_checked})
 
     def check_pattern_match(self, value, base_value, target_preserved_bits=50):
         """Check if a value matches relaxed criteria"""
@@ -64,55 +81,49 @@ class PuzzleSearch:
         }
 
     def verify_address(self, value):
-        """Generate and verify addresses for a value"""
+        """Generate {address_type: address} for the selected address types"""
         try:
-            hex_val = hex(value)[2:].zfill(64)
-            pub = privtopub(hex_val)
-            pub_compressed = compress(pub)
-            
-            addr = pubtoaddr(pub)
-            addr_compressed = pubtoaddr(pub_compressed)
-            
-            return addr, addr_compressed
-        except:
-            return None, None
+            hash_compressed, hash_uncompressed = self.backend.hash160s(value, self.address_types)
+            return encode_addresses(hash_compressed, hash_uncompressed, self.address_types)
+        except Exception:
+            return {}
 
-    def print_progress(self, current_value, pattern_matches):
-        """Print search progress"""
-        elapsed_time = time.time() - self.start_time
-        keys_per_second = self.keys_checked / elapsed_time if elapsed_time > 0 else 0
-        
-        print(f"\rKeys checked: {self.keys_checked:,} | "
-              f"Speed: {keys_per_second:.2f} keys/s | "
-              f"Pattern matches: {pattern_matches} | "
-              f"Current: 0x{current_value:x}", end='')
+    def print_progress(self, current_value, range_done):
+        """Redraw the telemetry block"""
+        self.telemetry.update(self.keys_checked, current_value, filters={'pattern': self.filter_passes},
+                              range_done=range_done)
 
     def search_range(self, start_offset, end_offset):
         """Search a range of values"""
         pattern_matches = 0
-        last_update = time.time()
-        update_interval = 1  # Update progress every second
+        self.telemetry.range_keys = end_offset - start_offset
         
-        for offset in range(start_offset, end_offset):
-            test_value = self.CURRENT_GUESS + offset
+        for test_value in self.ledger.scan(self.CURRENT_GUESS + start_offset, self.CURRENT_GUESS + end_offset):
+            offset = test_value - self.CURRENT_GUESS
             self.keys_checked += 1
             
-            # Progress update
-            current_time = time.time()
-            if current_time - last_update >= update_interval:
-                self.print_progress(test_value, pattern_matches)
-                last_update = current_time
+            # Progress update; the clock is only read every SAMPLE_EVERY keys
+            if self.keys_checked % SAMPLE_EVERY == 0 and self.telemetry.due():
+                self.print_progress(test_value, offset - start_offset)
+                
+                # Everything before this offset has been checked
+                if self.position:
+                    self.position[2] = offset
+                    if self.checkpoint.due():
+                        self.save_checkpoint()
             
             if self.check_pattern_match(test_value, self.BASE_VALUE):
                 pattern_matches += 1
-                addr_uncomp, addr_comp = self.verify_address(test_value)
+                self.filter_passes += 1
+                addresses = self.verify_address(test_value)
                 
-                if addr_uncomp == self.TARGET_ADDRESS or addr_comp == self.TARGET_ADDRESS:
+                if self.TARGET_ADDRESS in addresses.values():
+                    self.telemetry.detach()
                     print(f"\n\nTARGET ADDRESS FOUND!")
                     print(f"{'='*50}")
                     print(f"Private Key: 0x{test_value:x}")
-                    print(f"Uncompressed: {addr_uncomp}")
-                    print(f"Compressed: {addr_comp}")
+                    for address_type, address in addresses.items():
+                        print(f"{address_type}: {address}")
                     analysis = self.analyze_value(test_value)
                     print("\nPattern Analysis:")
                     print(f"Preserved bits: {analysis['preserved_bits']}")
@@ -125,8 +136,8 @@ class PuzzleSearch:
                     with open('puzzle67_solution.txt', 'w') as f:
                         f.write(f"Found at: {datetime.now()}\n")
                         f.write(f"Private Key: 0x{test_value:x}\n")
-                        f.write(f"Uncompressed Address: {addr_uncomp}\n")
-                        f.write(f"Compressed Address: {addr_comp}\n")
+                        for address_type, address in addresses.items():
+                            f.write(f"{address_type}: {address}\n")
                         f.write(f"\nAnalysis:\n")
                         for k, v in analysis.items():
                             f.write(f"{k}: {v}\n")
@@ -135,12 +146,13 @@ class PuzzleSearch:
                 
                 # Detailed output for pattern matches
                 if pattern_matches % 10 == 0:
+                    self.telemetry.detach()
                     print(f"\n\nPattern Match #{pattern_matches}:")
                     print(f"{'='*50}")
                     print(f"Value: 0x{test_value:x}")
                     print(f"Addresses:")
-                    print(f"  Uncompressed: {addr_uncomp}")
-                    print(f"  Compressed: {addr_comp}")
+                    for address_type, address in addresses.items():
+                        print(f"  {address_type}: {address}")
                     analysis = self.analyze_value(test_value)
                     print("\nPattern Analysis:")
                     print(f"Preserved bits: {analysis['preserved_bits']}")
@@ -153,20 +165,48 @@ class PuzzleSearch:
 
     def continuous_search(self, chunk_size=100000):
         """Continuously search in expanding ranges until found"""
+        # Resume where a previous run with the same parameters stopped
+        self.checkpoint = Checkpoint('continuous_search', {
+            'target_address': self.TARGET_ADDRESS, 'current_guess': self.CURRENT_GUESS,
+            'base_value': self.BASE_VALUE, 'chunk_size': chunk_size, 'address_types': self.address_types})
+        state = self.checkpoint.load()
         range_multiplier = 1
-        while True:
-            print(f"\n\nSearching range {range_multiplier} (±{chunk_size * range_multiplier:,} from base)")
-            print(f"{'='*70}")
-            
-            # Search positive range
-            if self.search_range(chunk_size * (range_multiplier-1), chunk_size * range_multiplier):
-                return
-            
-            # Search negative range
-            if self.search_range(-chunk_size * range_multiplier, -chunk_size * (range_multiplier-1)):
-                return
-            
-            range_multiplier += 1
+        resume_direction, resume_offset = None, None
+        if state:
+            range_multiplier = state['range_multiplier']
+            resume_direction, resume_offset = state['direction'], state['offset']
+            self.keys_checked = state['keys_checked']
+            self.telemetry = Telemetry("Continuous search", keys_checked=self.keys_checked)
+            print(f"Resuming range {range_multiplier} ({resume_direction}) at offset {resume_offset:,}")
+        
+        try:
+            while True:
+                self.telemetry.detach()
+                print(f"\n\nSearching range {range_multiplier} (±{chunk_size * range_multiplier:,} from base)")
+                print(f"{'='*70}")
+                
+                # Search positive range
+                start = chunk_size * (range_multiplier-1)
+                if resume_direction == 'pos':
+                    start = resume_offset
+                if resume_direction != 'neg':
+                    self.position = [range_multiplier, 'pos', start]
+                    if self.search_range(start, chunk_size * range_multiplier):
+                        return
+                
+                # Search negative range
+                start = -chunk_size * range_multiplier
+                if resume_direction == 'neg':
+                    start = resume_offset
+                self.position = [range_multiplier, 'neg', start]
+                if self.search_range(start, -chunk_size * (range_multiplier-1)):
+                    return
+                
+                resume_direction = None
+                range_multiplier += 1
+                self.position = [range_multiplier, 'pos', chunk_size * (range_multiplier-1)]
+        finally:
+            self.save_checkpoint()
 
 if __name__ == '__main__':
     print("Starting continuous search for puzzle 67...")
@@ -174,5 +214,10 @@ if __name__ == '__main__':
     print(f"{'='*70}")
     
     searcher = PuzzleSearch()
-    searcher.continuous_search()
+    print(f"Key backend: {searcher.backend.name}")
+    serve_metrics(lambda: searcher_metrics(searcher), labels={'searcher': 'continuous_search'})
+    try:
+        searcher.continuous_search()
+    except KeyboardInterrupt:
+        print("\n\nSearch interrupted by user")
 
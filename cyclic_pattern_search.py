@@ -1,13 +1,19 @@
-from bitcoin import *
 from decimal import Decimal, getcontext
 import time
 from datetime import datetime
+from scan_ledger import ScanLedger
+from search_rings import expanding_rings
+from bitcoin_address import encode_addresses, P2PKH_COMPRESSED
+from key_backends import select_backend
+from metrics_server import serve_metrics, searcher_metrics
 
 # Set precision
 getcontext().prec = 1000
 
 class CyclicPatternSearch:
-    def __init__(self):
+    def __init__(self, address_types=(P2PKH_COMPRESSED,)):
+        # Puzzle 70 matched in compressed format, so only that encoding is derived by default
+        self.address_types = address_types
         self.PHI = Decimal('1.6180339887498948482045868343656381177203091798057628621354486227052604628189024497072072041893911374847540880753868917521266338622235369317931800607667263544333890865959395829056383226613199282902678806752087668925017116962070322210432162695486262963136144381497587012203408058879544547492461856953648644492410443207713449470495658467885098743394422125448770664780915884607499887124007652170575179788341662562494075890697040002812104276217711177780531531714101170466659914669798731761356006708748071013179523689427521948435305678300228785699782977834784587822891109762500302696156170025046433824377648610283831268330372429267526311653392473167111211588186385133162038400522216579128667529465490681131715993432359734949850904094762132229810172610705961164562990981629055520852479035240602017279974717534277759277862561943208275051312181562855122248093947123414517022373580577278616008688382952304592647878017889921990270776903895321968198615143780314997411069260886742962267575605231727775203536139362')
         
         # Known puzzles and their modulo values
@@ -21,6 +27,8 @@ class CyclicPatternSearch:
         self.TARGET_ADDRESS = "1BY8GQbnueYofwSuFAT3USAhGjPrkxDdW9"
         self.keys_checked = 0
         self.start_time = time.time()
+        self.backend = select_backend()
+        self.ledger = ScanLedger(self.TARGET_ADDRESS, address_types, pattern='cyclic_pattern_search')
 
     def calculate_expected_value(self):
         """Calculate expected value based on known patterns"""
@@ -53,18 +61,12 @@ class CyclicPatternSearch:
         return True
 
     def verify_address(self, value):
-        """Generate and verify Bitcoin address"""
+        """Generate {address_type: address} for the selected address types"""
         try:
-            hex_val = hex(value)[2:].zfill(64)
-            pub = privtopub(hex_val)
-            pub_compressed = compress(pub)
-            
-            addr = pubtoaddr(pub)
-            addr_compressed = pubtoaddr(pub_compressed)
-            
-            return addr, addr_compressed
+            hash_compressed, hash_uncompressed = self.backend.hash160s(value, self.address_types)
+            return encode_addresses(hash_compressed, hash_uncompressed, self.address_types)
         except:
-            return None, None
+            return {}
 
     def print_progress(self, current_value, pattern_matches):
         """Print search progress"""
@@ -76,76 +78,88 @@ class CyclicPatternSearch:
               f"Matches: {pattern_matches} | "
               f"Current: 0x{current_value:x}", end='')
 
-    def search(self, range_size=1000000):
-        """Search around expected value with cyclic pattern matching"""
-        expected = self.calculate_expected_value()
-        
-        print(f"Starting cyclic pattern search")
-        print(f"Expected value around: 0x{expected:x}")
-        print("=" * 70)
-        
+    def search_ranges(self, ranges):
+        """Search [start, end) key ranges with cyclic pattern matching"""
         pattern_matches = 0
         last_update = time.time()
         
-        for offset in range(-range_size, range_size + 1):
-            test_value = expected + offset
-            self.keys_checked += 1
-            
-            if time.time() - last_update >= 1:
-                self.print_progress(test_value, pattern_matches)
-                last_update = time.time()
-            
-            if self.verify_cyclic_pattern(test_value):
-                pattern_matches += 1
-                addr_uncomp, addr_comp = self.verify_address(test_value)
+        for start, end in ranges:
+            for test_value in self.ledger.scan(start, end):
+                self.keys_checked += 1
                 
-                if addr_comp == self.TARGET_ADDRESS:  # We know it matches compressed format
-                    print(f"\n\nSOLUTION FOUND!")
-                    print("=" * 50)
-                    print(f"Private Key: 0x{test_value:x}")
-                    print(f"Compressed Address: {addr_comp}")
-                    
-                    # Verify patterns
-                    ratio_66 = Decimal(test_value) / Decimal(self.KNOWN_PUZZLES[0][1])
-                    ratio_68 = Decimal(self.KNOWN_PUZZLES[1][1]) / Decimal(test_value)
-                    mod_29 = test_value % 0x29
-                    
-                    print("\nPattern Verification:")
-                    print(f"Ratio to puzzle 66: {float(ratio_66):.10f}")
-                    print(f"Ratio to puzzle 68: {float(ratio_68):.10f}")
-                    print(f"Modulo 0x29: 0x{mod_29:x}")
+                if time.time() - last_update >= 1:
+                    self.print_progress(test_value, pattern_matches)
+                    last_update = time.time()
+                
+                if self.verify_cyclic_pattern(test_value):
+                    pattern_matches += 1
+                    addresses = self.verify_address(test_value)
                     
-                    with open('puzzle67_solution.txt', 'w') as f:
-                        f.write(f"Found: {datetime.now()}\n")
-                        f.write(f"Private Key: 0x{test_value:x}\n")
-                        f.write(f"Compressed Address: {addr_comp}\n")
-                        f.write(f"\nVerification:\n")
-                        f.write(f"Ratio to 66: {float(ratio_66):.10f}\n")
-                        f.write(f"Ratio to 68: {float(ratio_68):.10f}\n")
-                        f.write(f"Modulo: 0x{mod_29:x}\n")
+                    if self.TARGET_ADDRESS in addresses.values():
+                        print(f"\n\nSOLUTION FOUND!")
+                        print("=" * 50)
+                        print(f"Private Key: 0x{test_value:x}")
+                        for address_type, address in addresses.items():
+                            print(f"{address_type}: {address}")
+                        
+                        # Verify patterns
+                        ratio_66 = Decimal(test_value) / Decimal(self.KNOWN_PUZZLES[0][1])
+                        ratio_68 = Decimal(self.KNOWN_PUZZLES[1][1]) / Decimal(test_value)
+                        mod_29 = test_value % 0x29
+                        
+                        print("\nPattern Verification:")
+                        print(f"Ratio to puzzle 66: {float(ratio_66):.10f}")
+                        print(f"Ratio to puzzle 68: {float(ratio_68):.10f}")
+                        print(f"Modulo 0x29: 0x{mod_29:x}")
+                        
+                        with open('puzzle67_solution.txt', 'w') as f:
+                            f.write(f"Found: {datetime.now()}\n")
+                            f.write(f"Private Key: 0x{test_value:x}\n")
+                            for address_type, address in addresses.items():
+                                f.write(f"{address_type}: {address}\n")
+                            f.write(f"\nVerification:\n")
+                            f.write(f"Ratio to 66: {float(ratio_66):.10f}\n")
+                            f.write(f"Ratio to 68: {float(ratio_68):.10f}\n")
+                            f.write(f"Modulo: 0x{mod_29:x}\n")
+                        
+                        return True
                     
-                    return True
-                
-                if pattern_matches % 10 == 0:
-                    print(f"\n\nPattern Match #{pattern_matches}:")
-                    print(f"Value: 0x{test_value:x}")
-                    print(f"Compressed Address: {addr_comp}")
-                    print(f"Modulo 0x29: 0x{test_value % 0x29:x}")
+                    if pattern_matches % 10 == 0:
+                        print(f"\n\nPattern Match #{pattern_matches}:")
+                        print(f"Value: 0x{test_value:x}")
+                        for address_type, address in addresses.items():
+                            print(f"{address_type}: {address}")
+                        print(f"Modulo 0x29: 0x{test_value % 0x29:x}")
         
         return False
 
-    def expand_search(self):
+    def search(self, range_size=1000000):
+        """Search around expected value with cyclic pattern matching"""
+        expected = self.calculate_expected_value()
+        
+        print(f"Starting cyclic pattern search")
+        print(f"Expected value around: 0x{expected:x}")
+        print("=" * 70)
+        
+        return self.search_ranges([(expected - range_size, expected + range_size + 1)])
+
+    def expand_search(self, range_size=1000000):
         """Continue searching in expanding ranges"""
-        range_size = 1000000
-        multiplier = 1
+        expected = self.calculate_expected_value()
+        
+        print(f"Starting cyclic pattern search")
+        print(f"Expected value around: 0x{expected:x}")
+        print("=" * 70)
         
-        while True:
-            print(f"\n\nSearching range {multiplier} (±{range_size * multiplier:,})")
-            if self.search(range_size * multiplier):
+        # Each round only visits the new ring, alternating between the + and - side
+        for ring, ranges in expanding_rings(expected, range_size):
+            print(f"\n\nSearching range {ring} (±{range_size * ring:,})")
+            if self.search_ranges(ranges):
                 return
-            multiplier += 1
 
 if __name__ == '__main__':
     searcher = CyclicPatternSearch()
+    print(f"Key backend: {searcher.backend.name}")
+    serve_metrics(lambda: searcher_metrics(searcher), labels={'searcher': 'cyclic_pattern_search'})
     searcher.expand_search()
 
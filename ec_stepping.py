@@ -0,0 +1,147 @@
+"""Sequential EC stepping for scanners that walk consecutive private keys.
+
+Only the first key of a work unit pays for a scalar multiplication; every
+following public key is obtained by adding G to the previous one. The
+batched engine goes further and shares a single modular inversion across
+a whole batch of additions (Montgomery's trick).
+"""
+from secp256k1 import P, G, GX, GY, point_multiply, point_add, point_negate, batch_inverse
+
+DEFAULT_BATCH_SIZE = 1024
+
+# Cached [1*G, 2*G, ..., n*G] tables and the sets of their x-coordinates, keyed by batch size
+_offset_tables = {}
+_offset_xs = {}
+
+def sequential_points(start_value, count):
+    """Yield (private_key_int, point) for count consecutive keys from start_value"""
+    point = point_multiply(start_value)
+    for private_key_int in range(start_value, start_value + count):
+        if point is None or point[0] == GX:
+            # Infinity or +-G: the plain addition formula below does not apply
+            yield private_key_int, point
+            point = point_add(point, G)
+            continue
+        yield private_key_int, point
+
+        # point + G
+        x, y = point
+        lam = (GY - y) * pow(GX - x, -1, P) % P
+        x3 = (lam * lam - x - GX) % P
+        point = (x3, (lam * (x - x3) - y) % P)
+
+def offset_table(size):
+    """Return the affine points [1*G, 2*G, ..., size*G]"""
+    table = _offset_tables.get(size)
+    if table is None:
+        table = [point for _, point in sequential_points(1, size)]
+        _offset_tables[size] = table
+        _offset_xs[size] = frozenset(px for px, _ in table)
+    return table
+
+def offset_xs(size):
+    """Set of the x-coordinates of offset_table(size): a point with one of them is +-i*G"""
+    offset_table(size)
+    return _offset_xs[size]
+
+def batch_points(start_value, count, batch_size=DEFAULT_BATCH_SIZE):
+    """Yield (private_key_int, point) for count consecutive keys, one inversion per batch"""
+    table = offset_table(batch_size)
+    table_xs = offset_xs(batch_size)
+    base = point_multiply(start_value)
+    batch_start = start_value
+    end_value = start_value + count
+    
+    while batch_start < end_value:
+        in_batch = min(batch_size, end_value - batch_start)
+        
+        if base is None or base[0] in table_xs:
+            # base = +-i*G for some i in the batch: step this batch one addition at a time
+            points = list(sequential_points(batch_start, batch_size + 1))
+            for private_key_int, point in points[:in_batch]:
+                yield private_key_int, point
+            base = points[-1][1]
+            batch_start += batch_size
+            continue
+        
+        x, y = base
+        inverses = batch_inverse([px - x for px, _ in table])
+        yield batch_start, base
+        
+        # base + i*G for i = 1..batch_size; the last one seeds the next batch
+        next_points = []
+        for (px, py), inv in zip(table, inverses):
+            lam = (py - y) * inv % P
+            x3 = (lam * lam - x - px) % P
+            next_points.append((x3, (lam * (x - x3) - y) % P))
+        
+        for i in range(1, in_batch):
+            yield batch_start + i, next_points[i - 1]
+        
+        base = next_points[-1]
+        batch_start += batch_size
+
+def _group_points(center, table):
+    """Return (center + i*G, center - i*G) lists for every i*G in table, sharing inversions"""
+    x, y = center
+    inverses = batch_inverse([px - x for px, _ in table])
+    plus = []
+    minus = []
+    for (px, py), inv in zip(table, inverses):
+        # center + i*G
+        lam = (py - y) * inv % P
+        x3 = (lam * lam - x - px) % P
+        plus.append((x3, (lam * (x - x3) - y) % P))
+        # center - i*G = center + (px, -py): same denominator, same inverse
+        lam = (-py - y) * inv % P
+        x3 = (lam * lam - x - px) % P
+        minus.append((x3, (lam * (x - x3) - y) % P))
+    return plus, minus
+
+def center_out_points(center_value, start_offset, count, half_width=DEFAULT_BATCH_SIZE):
+    """Yield (private_key_int, point) for offsets d in [start_offset, start_offset + count)
+    on both sides of center_value: center_value + d and center_value - (d + 1).
+    
+    Keys are produced in groups of 2 * half_width + 1 around a group center S,
+    where S + i*G and S - i*G share the denominator x(i*G) - x(S) and thus one
+    inversion yields two keys. Groups are emitted ring by ring outwards, one
+    positive and one negative group per ring.
+    """
+    table = offset_table(half_width)
+    table_xs = offset_xs(half_width)
+    group_size = 2 * half_width + 1
+    pos_low = center_value + start_offset
+    pos_high = pos_low + count
+    neg_high = center_value - start_offset
+    neg_low = neg_high - count
+    
+    step = point_multiply(group_size)
+    pos_center_value = pos_low + half_width
+    neg_center_value = neg_high - 1 - half_width
+    pos_center = point_multiply(pos_center_value)
+    neg_center = point_multiply(neg_center_value)
+    
+    while pos_center_value - half_width < pos_high:
+        for group_value, group_center, low, high in (
+                (pos_center_value, pos_center, pos_low, pos_high),
+                (neg_center_value, neg_center, neg_low, neg_high)):
+            if group_center is None or group_center[0] in table_xs:
+                # Degenerate group (center = +-i*G): fall back to one addition per key
+                for private_key_int, point in sequential_points(group_value - half_width, group_size):
+                    if low <= private_key_int < high:
+                        yield private_key_int, point
+                continue
+            
+            plus, minus = _group_points(group_center, table)
+            if low <= group_value < high:
+                yield group_value, group_center
+            for i in range(half_width):
+                if low <= group_value + i + 1 < high:
+                    yield group_value + i + 1, plus[i]
+                if low <= group_value - i - 1 < high:
+                    yield group_value - i - 1, minus[i]
+        
+        pos_center_value += group_size
+        neg_center_value -= group_size
+        pos_center = point_add(pos_center, step)
+        neg_center = point_add(neg_center, point_negate(step))
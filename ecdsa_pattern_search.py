@@ -1,8 +1,10 @@
-from bitcoin import *
 import hashlib
 from decimal import Decimal, getcontext
 import time
 from datetime import datetime
+from bitcoin_address import hash160_to_address
+from key_backends import select_backend
+from metrics_server import serve_metrics, searcher_metrics
 
 class ECDSAPatternSearch:
     def __init__(self):
@@ -15,6 +17,7 @@ class ECDSAPatternSearch:
         self.N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
         self.keys_checked = 0
         self.start_time = time.time()
+        self.backend = select_backend()
 
     def verify_ecdsa_pattern(self, value):
         """Check if value follows ECDSA-like patterns"""
@@ -39,10 +42,7 @@ class ECDSAPatternSearch:
     def verify_address(self, value):
         """Generate and verify address"""
         try:
-            hex_val = hex(value)[2:].zfill(64)
-            pub = privtopub(hex_val)
-            pub_compressed = compress(pub)
-            addr = pubtoaddr(pub_compressed)
+            addr = hash160_to_address(self.backend.hash160(value))
             
             return addr
         except:
@@ -131,6 +131,8 @@ class ECDSAPatternSearch:
 if __name__ == '__main__':
     try:
         searcher = ECDSAPatternSearch()
+        print(f"Key backend: {searcher.backend.name}")
+        serve_metrics(lambda: searcher_metrics(searcher), labels={'searcher': 'ecdsa_pattern_search'})
         searcher.run_search()
     except KeyboardInterrupt:
         print("\n\nSearch interrupted by user")
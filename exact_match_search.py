@@ -1,19 +1,29 @@
-from bitcoin import *
 from decimal import Decimal, getcontext
-import time
 from datetime import datetime
-import sys
+from scan_ledger import ScanLedger
+from search_rings import expanding_rings
+from telemetry import Telemetry, SAMPLE_EVERY
+from bitcoin_address import hash160_to_address, P2PKH_COMPRESSED
+from key_backends import select_backend
+from metrics_server import serve_metrics, searcher_metrics, stage_metrics
+from stage_profiler import profiler_from_env, profile_backend_key, FILTERED_KEY_STAGE, FILTERED_OTHER_STAGE
 
 # Set precision
 getcontext().prec = 1000
 
+# Only keys passing verify_constraints reach verify_address, where the profiler ticks
+PROFILER = profiler_from_env(FILTERED_KEY_STAGE, FILTERED_OTHER_STAGE)
+
 class ExactMatchSearch:
     def __init__(self):
         self.TARGET_ADDRESS = "1BY8GQbnueYofwSuFAT3USAhGjPrkxDdW9"
         self.PUZZLE_66 = 0x2832ED74F2B5E35EE
         self.PUZZLE_68 = 0x4F463CE6CD49BF595
         self.keys_checked = 0
-        self.start_time = time.time()
+        self.filter_passes = 0  # Keys that passed verify_constraints
+        self.backend = select_backend()
+        self.telemetry = Telemetry("Exact match search")
+        self.ledger = ScanLedger(self.TARGET_ADDRESS, (P2PKH_COMPRESSED,), pattern='exact_match_search')
         
         print(f"Initializing search for exact address: {self.TARGET_ADDRESS}")
         print("=" * 70)
@@ -21,15 +31,11 @@ class ExactMatchSearch:
     def verify_address(self, private_key_int):
         """Generate and verify Bitcoin address"""
         try:
-            # Convert to hex and pad
-            hex_val = hex(private_key_int)[2:].zfill(64)
-            
-            # Generate public key
-            pub = privtopub(hex_val)
-            pub_compressed = compress(pub)
-            
             # Generate compressed address only (we know target is compressed)
-            addr_compressed = pubtoaddr(pub_compressed)
+            if PROFILER and PROFILER.tick():
+                addr_compressed = profile_backend_key(PROFILER, self.backend, private_key_int)
+            else:
+                addr_compressed = hash160_to_address(self.backend.hash160(private_key_int))
             
             # Immediately return True if exact match found
             if addr_compressed == self.TARGET_ADDRESS:
@@ -69,19 +75,11 @@ class ExactMatchSearch:
             print(f"\nError in constraints check: {str(e)}")
             return False
 
-    def print_progress(self, current_value, pattern_matches, latest_addr=None):
-        """Print search progress"""
-        elapsed = time.time() - self.start_time
-        speed = self.keys_checked / elapsed if elapsed > 0 else 0
-        
-        sys.stdout.write("\033[K")  # Clear line
-        print(f"\rKeys: {self.keys_checked:,} | "
-              f"Speed: {speed:.2f} k/s | "
-              f"Matches: {pattern_matches} | "
-              f"Current: 0x{current_value:x}", end='')
-        if latest_addr:
-            print(f"\nLatest compressed addr: {latest_addr}", end='')
-        sys.stdout.flush()
+    def print_progress(self, current_value, range_done, latest_addr=None):
+        """Redraw the telemetry block"""
+        self.telemetry.update(self.keys_checked, current_value, filters={'constraints': self.filter_passes},
+                              range_done=range_done,
+                              details={'Latest compressed addr': latest_addr} if latest_addr else None)
 
     def save_solution(self, private_key, address):
         """Save found solution to file"""
@@ -98,44 +96,54 @@ class ExactMatchSearch:
 
     def search_range(self, start_value, range_size):
         """Search a specific range of values"""
+        return self.search_ranges([(start_value, start_value + range_size)])
+
+    def search_ranges(self, ranges):
+        """Search [start, end) ranges of values"""
         pattern_matches = 0
-        last_update = time.time()
         latest_addr = None
+        ranges = list(ranges)
+        self.telemetry.range_keys = sum(end - start for start, end in ranges)
+        range_done = 0
         
-        for offset in range(range_size):
-            test_value = start_value + offset
-            self.keys_checked += 1
-            
-            # Update progress
-            if time.time() - last_update >= 0.5:  # Update every 0.5 seconds
-                self.print_progress(test_value, pattern_matches, latest_addr)
-                last_update = time.time()
-            
-            # First check basic constraints (faster)
-            if self.verify_constraints(test_value):
-                pattern_matches += 1
+        for start, end in ranges:
+            for test_value in self.ledger.scan(start, end):
+                self.keys_checked += 1
                 
-                # Then verify address (more expensive)
-                is_match, address = self.verify_address(test_value)
-                latest_addr = address
+                # Update progress; the clock is only read every SAMPLE_EVERY keys
+                if self.keys_checked % SAMPLE_EVERY == 0 and self.telemetry.due():
+                    self.print_progress(test_value, range_done + test_value - start, latest_addr)
                 
-                if is_match:
-                    print("\n\nEXACT MATCH FOUND!")
-                    print("=" * 50)
-                    print(f"Private Key: 0x{test_value:x}")
-                    print(f"Address: {address}")
-                    print(f"Matches Target: {address == self.TARGET_ADDRESS}")
+                # First check basic constraints (faster)
+                if self.verify_constraints(test_value):
+                    pattern_matches += 1
+                    self.filter_passes += 1
                     
-                    # Save solution
-                    self.save_solution(test_value, address)
-                    return True
-                
-                # Show details for pattern matches
-                if pattern_matches % 10 == 0:
-                    print(f"\n\nPattern Match #{pattern_matches}:")
-                    print(f"Value: 0x{test_value:x}")
-                    print(f"Address: {address}")
-                    print(f"Target: {self.TARGET_ADDRESS}")
+                    # Then verify address (more expensive)
+                    is_match, address = self.verify_address(test_value)
+                    latest_addr = address
+                    
+                    if is_match:
+                        self.telemetry.detach()
+                        print("\n\nEXACT MATCH FOUND!")
+                        print("=" * 50)
+                        print(f"Private Key: 0x{test_value:x}")
+                        print(f"Address: {address}")
+                        print(f"Matches Target: {address == self.TARGET_ADDRESS}")
+                        
+                        # Save solution
+                        self.save_solution(test_value, address)
+                        return True
+                    
+                    # Show details for pattern matches
+                    if pattern_matches % 10 == 0:
+                        self.telemetry.detach()
+                        print(f"\n\nPattern Match #{pattern_matches}:")
+                        print(f"Value: 0x{test_value:x}")
+                        print(f"Address: {address}")
+                        print(f"Target: {self.TARGET_ADDRESS}")
+
+            range_done += end - start
         
         return False
 
@@ -148,25 +156,24 @@ class ExactMatchSearch:
         print("=" * 70)
         
         range_size = 1000000
-        multiplier = 1
         
-        while True:
-            print(f"\n\nSearching range {multiplier} (±{range_size * multiplier:,})")
+        # Each round only visits the new ring, alternating between the + and - side
+        for ring, ranges in expanding_rings(expected, range_size):
+            self.telemetry.detach()
+            print(f"\n\nSearching range {ring} (±{range_size * ring:,})")
             print("-" * 50)
             
-            # Search positive direction
-            if self.search_range(expected, range_size * multiplier):
+            if self.search_ranges(ranges):
                 return
-            
-            # Search negative direction
-            if self.search_range(expected - range_size * multiplier, range_size * multiplier):
-                return
-            
-            multiplier += 1
 
 if __name__ == '__main__':
     try:
         searcher = ExactMatchSearch()
+        print(f"Key backend: {searcher.backend.name}")
+        collectors = [lambda: searcher_metrics(searcher)]
+        if PROFILER:
+            collectors.append(lambda: stage_metrics(PROFILER.stage_seconds()))
+        serve_metrics(*collectors, labels={'searcher': 'exact_match_search'})
         searcher.run_search()
     except KeyboardInterrupt:
         print("\n\nSearch interrupted by user")
@@ -0,0 +1,199 @@
+"""NumPy multi-lane hashing for batches of serialized public keys.
+
+hashlib pays the interpreter's per-call overhead once per pubkey. Here a
+batch of N equal-length messages is hashed at once: message words are
+uint32 arrays with one lane per message, so every SHA-256 or RIPEMD-160
+step is a handful of array operations over all N lanes. Messages are
+typically 33-byte compressed pubkeys (one block) or 65-byte uncompressed
+ones (two blocks); hash160_lanes() chains the two without leaving NumPy.
+
+Requires numpy; scanners import this module only when SHA256_ENGINE is
+"numpy".
+"""
+import numpy as np
+from ripemd160 import R_LEFT, R_RIGHT, S_LEFT, S_RIGHT, K_LEFT, K_RIGHT, IV
+
+SHA256_K = np.array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+], dtype=np.uint32)
+SHA256_IV = np.array([0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a,
+                      0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19], dtype=np.uint32)
+
+SHA256_K_COLUMN = SHA256_K[:, None]  # Added to the whole message schedule at once
+SHIFTS = [np.uint32(n) for n in range(33)]
+
+def _rotations(x, rotations, shift, out, tmp):
+    """XOR of x rotated right by each of rotations (and shifted right by shift, if any) into out"""
+    np.right_shift(x, SHIFTS[rotations[0]], out=out)
+    np.left_shift(x, SHIFTS[32 - rotations[0]], out=tmp)
+    out ^= tmp
+    for n in rotations[1:]:
+        np.right_shift(x, SHIFTS[n], out=tmp)
+        out ^= tmp
+        np.left_shift(x, SHIFTS[32 - n], out=tmp)
+        out ^= tmp
+    if shift:
+        np.right_shift(x, SHIFTS[shift], out=tmp)
+        out ^= tmp
+    return out
+
+def _pad(messages, block_bytes=64, length_bytes=8, byteorder='big'):
+    """(lanes, bytes) uint8 array of MD-padded equal-length messages (a list of bytes or a uint8 array)"""
+    if isinstance(messages, np.ndarray):
+        rows = messages
+    else:
+        length = len(messages[0])
+        if any(len(message) != length for message in messages):
+            raise ValueError("All messages of a batch must have the same length")
+        rows = np.frombuffer(b"".join(messages), dtype=np.uint8).reshape(len(messages), length)
+    length = rows.shape[1]
+    blocks = (length + 1 + length_bytes + block_bytes - 1) // block_bytes
+    padded = np.zeros((len(rows), blocks * block_bytes), dtype=np.uint8)
+    padded[:, :length] = rows
+    padded[:, length] = 0x80
+    padded[:, -length_bytes:] = np.frombuffer((length * 8).to_bytes(length_bytes, byteorder), dtype=np.uint8)
+    return padded
+
+def sha256_lanes(messages):
+    """SHA-256 digests of equal-length messages, hashed together; returns a (lanes, 32) uint8 array"""
+    padded = _pad(messages)
+    lanes = len(messages)
+    # Word t of every lane is one contiguous row
+    words = padded.view('>u4').astype(np.uint32).T.copy()
+    state = [np.full(lanes, value, dtype=np.uint32) for value in SHA256_IV]
+
+    # Every operation writes into preallocated rows; temporaries would dominate the cost
+    w = np.empty((64, lanes), dtype=np.uint32)
+    t1, t2, tmp, tmp2 = (np.empty(lanes, dtype=np.uint32) for _ in range(4))
+    for block in range(0, len(words), 16):
+        w[:16] = words[block:block + 16]
+        for t in range(16, 64):
+            wt = w[t]
+            _rotations(w[t - 15], (7, 18), 3, wt, tmp)
+            wt += w[t - 16]
+            wt += w[t - 7]
+            wt += _rotations(w[t - 2], (17, 19), 10, tmp2, tmp)
+        w += SHA256_K_COLUMN
+
+        a, b, c, d, e, f, g, h = (x.copy() for x in state)
+        for t in range(64):
+            # t1 = h + Sigma1(e) + Ch(e, f, g) + K[t] + w[t]
+            _rotations(e, (6, 11, 25), 0, t1, tmp)
+            t1 += h
+            t1 += w[t]
+            np.bitwise_xor(f, g, out=tmp)
+            tmp &= e
+            tmp ^= g
+            t1 += tmp
+            # t2 = Sigma0(a) + Maj(a, b, c)
+            _rotations(a, (2, 13, 22), 0, t2, tmp)
+            np.bitwise_xor(b, c, out=tmp)
+            tmp &= a
+            np.bitwise_and(b, c, out=tmp2)
+            tmp ^= tmp2
+            t2 += tmp
+            # e' = d + t1 in d's row, a' = t1 + t2 in h's row (h is not needed any more)
+            d += t1
+            np.add(t1, t2, out=h)
+            a, b, c, d, e, f, g, h = h, a, b, c, d, e, f, g
+        for x, y in zip(state, (a, b, c, d, e, f, g, h)):
+            x += y
+
+    return np.stack(state, axis=1).astype('>u4').view(np.uint8)
+
+def sha256_batch(messages):
+    """SHA-256 digests of equal-length messages as a list of bytes"""
+    if not messages:
+        return []
+    digests = sha256_lanes(messages).tobytes()
+    return [digests[i:i + 32] for i in range(0, len(digests), 32)]
+
+RIPEMD160_K_LEFT = [np.uint32(k) for k in K_LEFT]
+RIPEMD160_K_RIGHT = [np.uint32(k) for k in K_RIGHT]
+
+def _rotate_left(x, n, out, tmp):
+    np.left_shift(x, SHIFTS[n], out=out)
+    np.right_shift(x, SHIFTS[32 - n], out=tmp)
+    out |= tmp
+    return out
+
+def _ripemd160_f(round_index, x, y, z, out):
+    """Boolean function of a round into out; the right line runs them in reverse order"""
+    if round_index == 0:
+        np.bitwise_xor(x, y, out=out)
+        out ^= z
+    elif round_index == 1:
+        np.bitwise_xor(y, z, out=out)  # (x & y) | (~x & z) == z ^ (x & (y ^ z))
+        out &= x
+        out ^= z
+    elif round_index == 2:
+        np.invert(y, out=out)
+        out |= x
+        out ^= z
+    elif round_index == 3:
+        np.bitwise_xor(x, y, out=out)  # (x & z) | (y & ~z) == y ^ (z & (x ^ y))
+        out &= z
+        out ^= y
+    else:
+        np.invert(z, out=out)
+        out |= y
+        out ^= x
+    return out
+
+def ripemd160_lanes(messages):
+    """RIPEMD-160 digests of equal-length messages, hashed together; returns a (lanes, 20) uint8 array.
+
+    messages may also be a (lanes, length) uint8 array such as sha256_lanes() returns.
+    """
+    padded = _pad(messages, byteorder='little')
+    lanes = len(padded)
+    words = padded.view('<u4').astype(np.uint32).T.copy()
+    state = [np.full(lanes, value, dtype=np.uint32) for value in IV]
+
+    f, t, tmp = (np.empty(lanes, dtype=np.uint32) for _ in range(3))
+    for block in range(0, len(words), 16):
+        x = words[block:block + 16]
+        lines = []
+        for r, s, k, reverse in ((R_LEFT, S_LEFT, RIPEMD160_K_LEFT, False),
+                                 (R_RIGHT, S_RIGHT, RIPEMD160_K_RIGHT, True)):
+            a, b, c, d, e = (v.copy() for v in state)
+            spare = np.empty(lanes, dtype=np.uint32)
+            for j in range(80):
+                round_index = j >> 4
+                # t = rol(a + f(b, c, d) + x[r[j]] + k, s[j]) + e, written into a's row
+                _ripemd160_f(4 - round_index if reverse else round_index, b, c, d, f)
+                a += f
+                a += x[r[j]]
+                a += k[round_index]
+                _rotate_left(a, s[j], t, tmp)
+                t += e
+                # c = rol(c, 10) into the spare row; the old a and c rows are free again
+                _rotate_left(c, 10, spare, tmp)
+                a, b, c, d, e, t, spare = e, t, b, spare, d, a, c
+            lines.append((a, b, c, d, e))
+        (al, bl, cl, dl, el), (ar, br, cr, dr, er) = lines
+        h0, h1, h2, h3, h4 = state
+        state = [h1 + cl + dr, h2 + dl + er, h3 + el + ar, h4 + al + br, h0 + bl + cr]
+
+    return np.stack(state, axis=1).astype('<u4').view(np.uint8)
+
+def ripemd160_batch(messages):
+    """RIPEMD-160 digests of equal-length messages as a list of bytes"""
+    if not len(messages):
+        return []
+    digests = ripemd160_lanes(messages).tobytes()
+    return [digests[i:i + 20] for i in range(0, len(digests), 20)]
+
+def hash160_lanes(messages):
+    """RIPEMD-160(SHA-256(message)) of equal-length messages as a list of bytes"""
+    if not messages:
+        return []
+    digests = ripemd160_lanes(sha256_lanes(messages)).tobytes()
+    return [digests[i:i + 20] for i in range(0, len(digests), 20)]
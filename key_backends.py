@@ -0,0 +1,179 @@
+"""Pluggable private key -> hash160 backends.
+
+Every backend takes private keys as ints and hands back SEC1 pubkey bytes
+and raw hash160 digests, with no hex string round trips. One backend wraps
+one library: coincurve, ecdsa, cryptography, bitcointx, pybitcointools and
+the in-repo secp256k1 module. select_backend() times each installed one on
+a few puzzle-sized keys at startup and keeps the fastest; set
+PUZZLE_BACKEND=<name> to force one.
+"""
+import os
+import time
+from scan_ledger import PUZZLE_67_LOW
+from secp256k1 import point_multiply, serialize_pubkey
+from bitcoin_address import hash160, needs_compressed, needs_uncompressed, DEFAULT_ADDRESS_TYPES
+
+BACKEND_ENV = "PUZZLE_BACKEND"
+SELECT_SECONDS = 0.05  # Timing budget per backend when picking the fastest
+CHECK_KEYS = (1, PUZZLE_67_LOW, PUZZLE_67_LOW + 12345)
+
+class KeyBackend:
+    """Private key int -> public key -> SEC1 bytes -> hash160; subclasses wrap one library"""
+    name = None
+
+    def public_key(self, private_key_int):
+        """The library's public key object for a private key"""
+        raise NotImplementedError
+
+    def serialize(self, public_key, compressed=True):
+        """SEC1 bytes of a public_key() result"""
+        raise NotImplementedError
+
+    def pubkey_bytes(self, private_key_int, compressed=True):
+        return self.serialize(self.public_key(private_key_int), compressed)
+
+    def hash160(self, private_key_int, compressed=True):
+        """hash160 of the compressed (or uncompressed) pubkey"""
+        return hash160(self.pubkey_bytes(private_key_int, compressed))
+
+    def hash160s(self, private_key_int, address_types=DEFAULT_ADDRESS_TYPES):
+        """Return (compressed hash160, uncompressed hash160), None for encodings not needed"""
+        public_key = self.public_key(private_key_int)
+        hash_compressed = hash160(self.serialize(public_key, True)) if needs_compressed(address_types) else None
+        hash_uncompressed = hash160(self.serialize(public_key, False)) if needs_uncompressed(address_types) else None
+        return hash_compressed, hash_uncompressed
+
+class CoincurveBackend(KeyBackend):
+    name = "coincurve"
+
+    def __init__(self):
+        from coincurve import PrivateKey
+        self.PrivateKey = PrivateKey
+
+    def public_key(self, private_key_int):
+        return self.PrivateKey(private_key_int.to_bytes(32, 'big')).public_key
+
+    def serialize(self, public_key, compressed=True):
+        return public_key.format(compressed=compressed)
+
+class EcdsaBackend(KeyBackend):
+    name = "ecdsa"
+
+    def __init__(self):
+        from ecdsa import SigningKey, SECP256k1
+        self.SigningKey = SigningKey
+        self.curve = SECP256k1
+
+    def public_key(self, private_key_int):
+        return self.SigningKey.from_secret_exponent(private_key_int, curve=self.curve).get_verifying_key()
+
+    def serialize(self, public_key, compressed=True):
+        return public_key.to_string("compressed" if compressed else "uncompressed")
+
+class CryptographyBackend(KeyBackend):
+    name = "cryptography"
+
+    def __init__(self):
+        from cryptography.hazmat.primitives.asymmetric import ec
+        from cryptography.hazmat.primitives.serialization import Encoding, PublicFormat
+        self.ec = ec
+        self.curve = ec.SECP256K1()
+        self.encoding = Encoding.X962
+        self.formats = {True: PublicFormat.CompressedPoint, False: PublicFormat.UncompressedPoint}
+
+    def public_key(self, private_key_int):
+        return self.ec.derive_private_key(private_key_int, self.curve).public_key()
+
+    def serialize(self, public_key, compressed=True):
+        return public_key.public_bytes(self.encoding, self.formats[compressed])
+
+class BitcointxBackend(KeyBackend):
+    name = "bitcointx"
+
+    def __init__(self):
+        from bitcointx.core.key import CKey
+        self.CKey = CKey
+
+    def public_key(self, private_key_int):
+        return private_key_int.to_bytes(32, 'big')  # CKey fixes the encoding when it is built
+
+    def serialize(self, public_key, compressed=True):
+        return bytes(self.CKey(public_key, compressed=compressed).pub)
+
+class PybitcointoolsBackend(KeyBackend):
+    name = "pybitcointools"
+
+    def __init__(self):
+        from bitcoin import fast_multiply, G
+        self.fast_multiply = fast_multiply
+        self.G = G
+
+    def public_key(self, private_key_int):
+        return self.fast_multiply(self.G, private_key_int)  # (x, y) ints, as privtopub computes before hex encoding
+
+    def serialize(self, public_key, compressed=True):
+        return serialize_pubkey(public_key, compressed)
+
+class Secp256k1Backend(KeyBackend):
+    name = "secp256k1.py"
+
+    def public_key(self, private_key_int):
+        return point_multiply(private_key_int)
+
+    def serialize(self, public_key, compressed=True):
+        return serialize_pubkey(public_key, compressed)
+
+# In order of preference when timings tie
+BACKENDS = {backend.name: backend for backend in (
+    CoincurveBackend, CryptographyBackend, BitcointxBackend, EcdsaBackend, PybitcointoolsBackend, Secp256k1Backend)}
+
+def load_backend(name):
+    """Instantiate a backend by name and check it against the in-repo arithmetic.
+
+    Raises ImportError when its library is not installed and ValueError when
+    it derives the wrong keys.
+    """
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown key backend {name!r}; choose from {', '.join(BACKENDS)}")
+    backend = BACKENDS[name]()
+    for k in CHECK_KEYS:
+        point = point_multiply(k)
+        if (backend.pubkey_bytes(k, True) != serialize_pubkey(point, True) or
+                backend.pubkey_bytes(k, False) != serialize_pubkey(point, False)):
+            raise ValueError(f"Key backend {name} derives the wrong pubkey for 0x{k:x}")
+    return backend
+
+def available_backends():
+    """{name: backend} of every backend that loads and checks out"""
+    backends = {}
+    for name in BACKENDS:
+        try:
+            backends[name] = load_backend(name)
+        except Exception:
+            continue  # Not installed or broken on this machine
+    return backends
+
+def keys_per_second(backend, seconds=SELECT_SECONDS, start_key=PUZZLE_67_LOW):
+    """Rough compressed hash160 rate of a backend"""
+    count = 0
+    start_time = time.perf_counter()
+    deadline = start_time + seconds
+    while True:
+        backend.hash160(start_key + count)
+        count += 1
+        now = time.perf_counter()
+        if now >= deadline:
+            return count / (now - start_time)
+
+_selected = None
+
+def select_backend(name=None):
+    """The named backend, PUZZLE_BACKEND's, or the fastest available one (timed once per process)"""
+    global _selected
+    name = name or os.environ.get(BACKEND_ENV)
+    if name:
+        return load_backend(name)
+    if _selected is None:
+        backends = available_backends()
+        _selected = max(backends.values(), key=keys_per_second)
+    return _selected
@@ -1,29 +1,27 @@
-from bitcoin import *
 import time
 from datetime import datetime
+from scan_ledger import ScanLedger
+from bitcoin_address import hash160_to_address, P2PKH_COMPRESSED
+from key_backends import select_backend
+from puzzle_targets import targets_for_range
+from metrics_server import serve_metrics, searcher_metrics
 
 class MethodicalSearch:
     def __init__(self):
-        self.TARGET = "1BY8GQbnueYofwSuFAT3USAhGjPrkxDdW9"
         self.PUZZLE_66 = 0x2832ED74F2B5E35EE
         self.PUZZLE_68 = 0x4F463CE6CD49BF595
+        # Check every open puzzle whose keyspace overlaps the searched range
+        self.targets = targets_for_range(self.PUZZLE_66, self.PUZZLE_68 + 1)
         self.keys_checked = 0
         self.start_time = time.time()
+        self.backend = select_backend()
+        self.ledger = ScanLedger(self.targets.ledger_targets(), (P2PKH_COMPRESSED,))  # Every key is hashed, compressed only
 
     def verify_address(self, value):
-        """Generate compressed address for a value"""
+        """Generate the compressed hash160 for a value"""
         try:
-            # Convert to hex and pad
-            hex_val = hex(value)[2:].zfill(64)
-            
-            # Generate public key
-            pub = privtopub(hex_val)
-            pub_compressed = compress(pub)
-            
-            # Generate only compressed address
-            addr = pubtoaddr(pub_compressed)
-            
-            return addr
+            # Only the compressed hash160; the address is encoded for display and hits
+            return self.backend.hash160(value)
         except Exception as e:
             return None
 
@@ -42,8 +40,7 @@ class MethodicalSearch:
         matches = 0
         last_update = time.time()
         
-        for offset in range(range_size):
-            test_value = start_value + offset
+        for test_value in self.ledger.scan(start_value, start_value + range_size):
             self.keys_checked += 1
             
             # Progress update
@@ -51,25 +48,30 @@ class MethodicalSearch:
                 self.print_progress(test_value, matches)
                 last_update = time.time()
             
-            # Check address
-            addr = self.verify_address(test_value)
-            if addr == self.TARGET:
+            # Check the hash160 against every target
+            hash_compressed = self.verify_address(test_value)
+            if hash_compressed in self.targets:
+                addr = hash160_to_address(hash_compressed)
                 print(f"\n\nFOUND TARGET!")
                 print("=" * 50)
+                for label, address in self.targets.hits(hash_compressed):
+                    print(f"Puzzle: {label}")
                 print(f"Private Key: 0x{test_value:x}")
                 print(f"Address: {addr}")
-                
+            
                 # Save result
                 with open('puzzle67_solution.txt', 'w') as f:
                     f.write(f"Found: {datetime.now()}\n")
+                    for label, address in self.targets.hits(hash_compressed):
+                        f.write(f"Puzzle: {label}\n")
                     f.write(f"Private Key: 0x{test_value:x}\n")
                     f.write(f"Address: {addr}\n")
                 return True
             
             # Show occasional matches
-            elif addr and self.keys_checked % 10000 == 0:
+            elif hash_compressed and self.keys_checked % 10000 == 0:
                 matches += 1
-                print(f"\nChecked address: {addr}")
+                print(f"\nChecked address: {hash160_to_address(hash_compressed)}")
         
         return False
 
@@ -78,7 +80,7 @@ class MethodicalSearch:
         print(f"Starting methodical search between:")
         print(f"Puzzle 66: 0x{self.PUZZLE_66:x}")
         print(f"Puzzle 68: 0x{self.PUZZLE_68:x}")
-        print(f"Target: {self.TARGET}")
+        print(f"Targets: {', '.join(self.targets.describe())}")
         print("=" * 70)
         
         value_range = self.PUZZLE_68 - self.PUZZLE_66
@@ -102,6 +104,8 @@ class MethodicalSearch:
 if __name__ == '__main__':
     try:
         searcher = MethodicalSearch()
+        print(f"Key backend: {searcher.backend.name}")
+        serve_metrics(lambda: searcher_metrics(searcher), labels={'searcher': 'methodical_search'})
         searcher.run_search()
     except KeyboardInterrupt:
         print("\n\nSearch interrupted by user")
@@ -0,0 +1,160 @@
+"""Prometheus metrics endpoint for unattended scanners.
+
+Set PUZZLE_METRICS_PORT (or pass a port) and a searcher serves its metrics
+in the Prometheus text format at http://127.0.0.1:<port>/metrics from a
+daemon thread. Collectors only read state the monitor keeps anyway: the
+shared progress counters through the telemetry, checkpoint save times and
+queue sizes. Worker hot loops are never touched.
+
+A collector is a callable returning a list of Metric tuples; the helpers
+below build them for the objects the searchers already have.
+"""
+import collections
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from telemetry import RATE_WINDOWS
+
+METRICS_PORT_ENV = "PUZZLE_METRICS_PORT"
+METRICS_HOST = "127.0.0.1"  # Never exposed beyond the box; scrape through an SSH tunnel or a local agent
+
+# samples is [(labels dict, value)]
+Metric = collections.namedtuple('Metric', 'name kind help samples')
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def format_metrics(metrics, labels=None):
+    """Render metrics in the Prometheus text exposition format, adding labels to every sample"""
+    lines = []
+    for metric in metrics:
+        lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for sample_labels, value in metric.samples:
+            merged = dict(labels or {}, **sample_labels)
+            label_text = ",".join(f'{key}="{_escape(val)}"' for key, val in merged.items())
+            lines.append(f"{metric.name}{{{label_text}}} {value}" if label_text else f"{metric.name} {value}")
+    return "\n".join(lines) + "\n"
+
+def telemetry_metrics(telemetry, keys_checked=None):
+    """Key counts and rates overall, per worker and per filter from a Telemetry"""
+    if keys_checked is None:
+        keys_checked = telemetry.keys_checked
+    rates = [({'window': f"{window}s"}, telemetry.meter.rate(window)) for window in RATE_WINDOWS]
+    rates.append(({'window': "lifetime"}, telemetry.meter.rate()))
+    metrics = [
+        Metric('puzzle_keys_checked_total', 'counter', "Keys checked", [({}, keys_checked)]),
+        Metric('puzzle_keys_per_second', 'gauge', "Keys checked per second", rates),
+        Metric('puzzle_filter_candidates_total', 'counter', "Keys that passed a pre-filter",
+               [({'filter': name}, passed) for name, passed in telemetry.filters.items()]),
+    ]
+    if telemetry.worker_names:
+        metrics.append(Metric('puzzle_worker_keys_checked_total', 'counter', "Keys checked per worker",
+                              [({'worker': name}, worker_keys) for name, (worker_keys, _)
+                               in zip(telemetry.worker_names, telemetry.worker_state)]))
+        metrics.append(Metric('puzzle_worker_keys_per_second', 'gauge',
+                              f"Keys checked per second per worker over {RATE_WINDOWS[0]}s",
+                              [({'worker': name}, meter.rate(RATE_WINDOWS[0])) for name, meter
+                               in zip(telemetry.worker_names, telemetry.worker_meters)]))
+    if telemetry.range_keys:
+        metrics.append(Metric('puzzle_range_keys', 'gauge', "Keys in the configured range",
+                              [({}, telemetry.range_keys)]))
+    return metrics
+
+def stage_metrics(timings):
+    """Seconds spent per pipeline stage from {stage: seconds}"""
+    return [Metric('puzzle_stage_seconds_total', 'counter', "Seconds spent per pipeline stage",
+                   [({'stage': stage}, seconds) for stage, seconds in timings.items()])]
+
+def checkpoint_metrics(checkpoint):
+    """Seconds since a Checkpoint was last saved"""
+    return [Metric('puzzle_checkpoint_age_seconds', 'gauge', "Seconds since the last checkpoint save",
+                   [({}, checkpoint.age())])]
+
+def queue_metrics(queues):
+    """Depth of each {name: queue}; sizes the platform cannot report are left out"""
+    samples = []
+    for name, queue in queues.items():
+        try:
+            samples.append(({'queue': name}, queue.qsize()))
+        except NotImplementedError:  # multiprocessing queues on macOS
+            continue
+    return [Metric('puzzle_queue_depth', 'gauge', "Messages waiting in a queue", samples)]
+
+def searcher_metrics(searcher):
+    """Metrics of a single-process *Search object from its keys_checked and telemetry"""
+    telemetry = getattr(searcher, 'telemetry', None)
+    if telemetry is not None:
+        metrics = telemetry_metrics(telemetry, searcher.keys_checked)
+    else:
+        elapsed = time.time() - searcher.start_time
+        metrics = [
+            Metric('puzzle_keys_checked_total', 'counter', "Keys checked", [({}, searcher.keys_checked)]),
+            Metric('puzzle_keys_per_second', 'gauge', "Keys checked per second",
+                   [({'window': "lifetime"}, searcher.keys_checked / elapsed if elapsed > 0 else 0.0)]),
+        ]
+    if getattr(searcher, 'checkpoint', None) is not None:
+        metrics += checkpoint_metrics(searcher.checkpoint)
+    return metrics
+
+class MetricsServer:
+    def __init__(self, collectors, port, host=METRICS_HOST, labels=None):
+        """Serve the metrics of collectors (callables returning Metric lists) on host:port"""
+        self.collectors = list(collectors)
+        self.labels = labels or {}
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/metrics', '/'):
+                    self.send_error(404)
+                    return
+                body = server.render().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Scrapes would scroll the progress display
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def address(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/metrics"
+
+    def render(self):
+        metrics = []
+        errors = 0
+        for collect in self.collectors:
+            try:
+                metrics.extend(collect())
+            except Exception:
+                errors += 1  # A broken collector must not take the endpoint down
+        metrics.append(Metric('puzzle_collector_errors', 'gauge', "Collectors that failed during this scrape",
+                              [({}, errors)]))
+        return format_metrics(metrics, self.labels)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+def serve_metrics(*collectors, port=None, labels=None):
+    """Start a MetricsServer if a port is given or set in PUZZLE_METRICS_PORT; None otherwise"""
+    if port is None:
+        port = os.environ.get(METRICS_PORT_ENV)
+    if not port:
+        return None
+    server = MetricsServer(collectors, int(port), labels=labels).start()
+    print(f"Metrics: {server.address}")
+    return server
@@ -0,0 +1,105 @@
+"""On-disk fixed-base tables of multiples of G or of a stride point (41*G, 2^k*G).
+
+A table holds d * 2^(wi) * base for every w-bit window i and d in
+1..2^(w-1), as a flat binary file:
+
+    header  magic, window bits, window count, base point (x || y)
+    points  x || y, 32 bytes each, big-endian, window after window
+
+Workers memory-map the file read-only instead of building a table in every
+process: opening takes milliseconds and all processes share the same page
+cache pages, so memory does not grow with the number of workers. A 16-bit
+table for G is 36 MB and turns a 67-bit key into four mixed additions.
+
+    python3 point_table.py <path> [window bits] [base multiplier, e.g. 41 or 2^20]
+
+Set PUZZLE_POINT_TABLES=<path>[:<path>...] and secp256k1.point_multiply()
+uses the mapped tables for their base points.
+"""
+import mmap
+import os
+import struct
+import sys
+import time
+from secp256k1 import G, N, point_multiply, fixed_windows, window_count, register_table
+
+MAGIC = b"PZ67PTB1"
+HEADER = struct.Struct(">8sHH64s")  # magic, window bits, window count, base x || y
+POINT_BYTES = 64
+DEFAULT_WINDOW_BITS = 16
+
+def _point_bytes(point):
+    return point[0].to_bytes(32, 'big') + point[1].to_bytes(32, 'big')
+
+class MappedWindow:
+    """One window of a mapped table; window[d - 1] is the affine d * 2^(wi) * base"""
+    def __init__(self, data, offset):
+        self.data = data
+        self.offset = offset
+
+    def __getitem__(self, index):
+        offset = self.offset + index * POINT_BYTES
+        data = self.data
+        return int.from_bytes(data[offset:offset + 32], 'big'), int.from_bytes(data[offset + 32:offset + 64], 'big')
+
+class MappedTable:
+    def __init__(self, path):
+        """Map a table file written by write_table() read-only"""
+        self.path = path
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.window_bits, windows, base = HEADER.unpack_from(self.map)
+        half = 1 << (self.window_bits - 1)
+        if magic != MAGIC or len(self.map) != HEADER.size + windows * half * POINT_BYTES:
+            self.map.close()
+            raise ValueError(f"{path} is not a complete point table")
+        self.base = (int.from_bytes(base[:32], 'big'), int.from_bytes(base[32:], 'big'))
+        self.windows = [MappedWindow(self.map, HEADER.size + i * half * POINT_BYTES) for i in range(windows)]
+        if self.windows[0][0] != self.base:
+            self.map.close()
+            raise ValueError(f"{path} does not start with its base point")
+
+    def close(self):
+        self.map.close()
+
+def write_table(path, base=G, window_bits=DEFAULT_WINDOW_BITS, progress=None):
+    """Write the fixed-base table of base to path (atomically, through a temporary file)"""
+    windows = window_count(window_bits)
+    temp_path = path + ".tmp"
+    with open(temp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, window_bits, windows, _point_bytes(base)))
+        for i, window in enumerate(fixed_windows(base, window_bits)):
+            f.write(b"".join(_point_bytes(point) for point in window))
+            if progress:
+                progress(i + 1, windows)
+    os.replace(temp_path, path)
+
+def load_tables(paths):
+    """Map table files and register them with secp256k1; returns the MappedTables"""
+    tables = [MappedTable(path) for path in paths if path]
+    for table in tables:
+        register_table(table)
+    return tables
+
+def parse_multiplier(text):
+    """'41', '0x29' or '2^20'"""
+    if '^' in text:
+        base, exponent = text.split('^')
+        return int(base, 0) ** int(exponent, 0)
+    return int(text, 0)
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print("Usage: python3 point_table.py <path> [window bits] [base multiplier, e.g. 41 or 2^20]")
+        sys.exit(1)
+    path = sys.argv[1]
+    window_bits = int(sys.argv[2]) if len(sys.argv) > 2 else DEFAULT_WINDOW_BITS
+    multiplier = parse_multiplier(sys.argv[3]) if len(sys.argv) > 3 else 1
+    base = point_multiply(multiplier % N)
+    size = HEADER.size + window_count(window_bits) * (1 << (window_bits - 1)) * POINT_BYTES
+
+    print(f"Writing {window_bits}-bit table of {multiplier:,} * G to {path} ({size / 2**20:,.1f} MiB)")
+    start_time = time.time()
+    write_table(path, base, window_bits,
+                lambda done, total: print(f"\r  window {done}/{total} ({time.time() - start_time:.1f}s)", end=""))
+    print(f"\nDone in {time.time() - start_time:.1f}s")
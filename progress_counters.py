@@ -0,0 +1,96 @@
+"""Per-worker progress counters in shared memory.
+
+Workers publish their keys-checked count and current position into one
+shared memory block instead of pickling progress messages through a queue;
+the monitor reads the block whenever it likes. Nothing is locked: each slot
+is written by one process only, and a sequence number around every write
+lets the reader retry the rare read that overlaps a write (a seqlock).
+
+Layout: four little-endian 64-bit words per slot,
+    [sequence, keys checked, position low 64 bits, position high 64 bits]
+(positions in the puzzle ranges need more than 64 bits).
+"""
+from multiprocessing import shared_memory
+
+SLOT_WORDS = 4
+WORD_MASK = (1 << 64) - 1
+PUBLISH_EVERY = 1024  # Keys between publishes from check loops
+
+class ProgressCounters:
+    def __init__(self, slots, name=None):
+        """Create zeroed counters for slots workers or work units"""
+        self.slots = slots
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=slots * SLOT_WORDS * 8)
+        self._attach_views()
+        for i in range(slots * SLOT_WORDS):
+            self.words[i] = 0
+
+    def _attach_views(self):
+        self.words = self.shm.buf.cast('Q')
+
+    def __getstate__(self):
+        # Worker processes attach to the block by name
+        return {'name': self.shm.name, 'slots': self.slots}
+
+    def __setstate__(self, state):
+        self.slots = state['slots']
+        self.shm = shared_memory.SharedMemory(name=state['name'])
+        self._attach_views()
+
+    def __len__(self):
+        return self.slots
+
+    def publish(self, slot, keys_checked, position):
+        """Store slot's running total and current position (called by the slot's owner only)"""
+        words = self.words
+        base = slot * SLOT_WORDS
+        sequence = words[base] + 1
+        words[base] = sequence  # Odd: write in progress
+        words[base + 1] = keys_checked
+        words[base + 2] = position & WORD_MASK
+        words[base + 3] = position >> 64
+        words[base] = sequence + 1
+
+    def read(self, slot):
+        """Return (keys checked, position) of slot; position is None before the first publish"""
+        words = self.words
+        base = slot * SLOT_WORDS
+        while True:
+            sequence = words[base]
+            keys_checked = words[base + 1]
+            position = words[base + 2] | words[base + 3] << 64
+            if sequence & 1 == 0 and words[base] == sequence:
+                return keys_checked, position if sequence else None
+
+    def snapshot(self):
+        """[(keys checked, position)] for every slot"""
+        return [self.read(slot) for slot in range(self.slots)]
+
+    def total(self):
+        """Keys checked over all slots"""
+        return sum(keys_checked for keys_checked, _ in self.snapshot())
+
+    def writer(self, slot):
+        """ProgressWriter that accumulates keys for slot"""
+        return ProgressWriter(self, slot)
+
+    def close(self):
+        """Detach this process from the shared block"""
+        self.words.release()
+        self.shm.close()
+
+    def unlink(self):
+        """Close and free the shared block (the creating process calls this once)"""
+        self.close()
+        self.shm.unlink()
+
+class ProgressWriter:
+    """Running keys-checked total of one slot, published on every advance"""
+    def __init__(self, counters, slot):
+        self.counters = counters
+        self.slot = slot
+        self.keys_checked, _ = counters.read(slot)
+
+    def advance(self, keys, position):
+        self.keys_checked += keys
+        self.counters.publish(self.slot, self.keys_checked, position)
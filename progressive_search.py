@@ -1,7 +1,9 @@
-from bitcoin import *
 from decimal import Decimal, getcontext
 import time
 from datetime import datetime
+from bitcoin_address import hash160_to_address
+from key_backends import select_backend
+from metrics_server import serve_metrics, searcher_metrics
 
 class ProgressiveSearch:
     def __init__(self):
@@ -13,6 +15,7 @@ class ProgressiveSearch:
         self.POWER_BASE = 2  # Base for power progression
         self.keys_checked = 0
         self.start_time = time.time()
+        self.backend = select_backend()
         
     def calculate_progression_value(self, puzzle_number, base_value):
         """Calculate value based on power progression"""
@@ -23,10 +26,7 @@ class ProgressiveSearch:
     def verify_address(self, value):
         """Generate and verify Bitcoin address"""
         try:
-            hex_val = hex(value)[2:].zfill(64)
-            pub = privtopub(hex_val)
-            pub_compressed = compress(pub)
-            addr_compressed = pubtoaddr(pub_compressed)
+            addr_compressed = hash160_to_address(self.backend.hash160(value))
             
             return addr_compressed == self.TARGET_ADDRESS, addr_compressed
         except:
@@ -106,6 +106,8 @@ class ProgressiveSearch:
 if __name__ == '__main__':
     try:
         searcher = ProgressiveSearch()
+        print(f"Key backend: {searcher.backend.name}")
+        serve_metrics(lambda: searcher_metrics(searcher), labels={'searcher': 'progressive_search'})
         searcher.run_search()
     except KeyboardInterrupt:
         print("\n\nSearch interrupted by user")
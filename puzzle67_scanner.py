@@ -3,21 +3,58 @@ import base58
 from datetime import datetime
 import threading
 import queue
-import time
+from itertools import islice
 from coincurve import PrivateKey
 import os
 import sys
+import multiprocessing as mp
 from multiprocessing import cpu_count
+from ec_stepping import sequential_points, batch_points, center_out_points
+from checkpoint import Checkpoint
+from ripemd160 import ripemd160
+from scan_ledger import ScanLedger, center_out_ranges
+from puzzle_targets import TargetSet, PUZZLE_TARGETS
+from target_index import TargetIndex
+from progress_counters import ProgressCounters, PUBLISH_EVERY
+from telemetry import Telemetry
+from metrics_server import (serve_metrics, telemetry_metrics, checkpoint_metrics, queue_metrics, stage_metrics,
+                            Metric)
+from stage_profiler import profiler_from_env, profile_coincurve_key, profile_point
+from bitcoin_address import (hash160, derive_hashes, derive_hashes_batch, encode_addresses,
+                             needs_compressed, needs_uncompressed, P2PKH_COMPRESSED, P2PKH_UNCOMPRESSED)
 
 # Constants
-TARGET_ADDRESS = "1BY8GQbnueYofwSuFAT3USAhGjPrkxDdW9"
+TARGETS = TargetSet(PUZZLE_TARGETS)  # Every open puzzle is checked in the same pass; the hot loop looks up raw digests
+TARGET_FILE = None  # Path to a file of target addresses (one per line); replaces TARGETS with a shared TargetIndex
 BASE_VALUE = 0x16230cfcfa9
-RANGE_PER_THREAD = 1_000_000  # How many values each thread checks before reporting
-THREAD_COUNT = 28  # Number of threads to use
+RANGE_PER_UNIT = 1_000_000  # How many values each work unit checks
+WORK_UNITS = 28  # Number of work units handed to the process pool
+SCAN_MODE = "center_out"  # "center_out" (BASE_VALUE +- i share one inversion), "batch" (shared inversion per batch), "incremental" (one point addition per key) or "scalar" (full multiply per key)
+BATCH_SIZE = 1024  # Points per shared modular inversion (offsets per side of a group in center_out mode)
+ADDRESS_TYPES = (P2PKH_COMPRESSED, P2PKH_UNCOMPRESSED)  # Only these encodings are derived; add P2WPKH for bc1q targets
+SHA256_ENGINE = "hashlib"  # "hashlib" (one call per pubkey) or "numpy" (BATCH_SIZE pubkeys per call in stepping modes)
+MONITOR_INTERVAL = 1  # Seconds between telemetry redraws
 
-# Queues for thread communication
+def available_cores():
+    """Number of cores this process may run on"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return cpu_count()
+
+WORKER_COUNT = available_cores()  # One process per usable core (threads would serialize on the GIL)
+PROFILER = profiler_from_env()  # PUZZLE_PROFILE=N times the stages of one key in N; workers send theirs to main()
+
+# Matches go through the result queue (main() swaps in a multiprocessing queue);
+# progress is published into shared memory counters, one slot per work unit
 result_queue = queue.Queue()
-progress_queue = queue.Queue()
+unit_counters = None
+
+def init_worker(results, counters, targets):
+    """Pool initializer: point a worker process at the result queue, progress counters and target set"""
+    global result_queue, unit_counters, TARGETS
+    result_queue = results
+    unit_counters = counters
+    TARGETS = targets
 
 def sha256(hex_str):
     return hashlib.sha256(bytes.fromhex(hex_str) if isinstance(hex_str, str) else hex_str).digest()
@@ -26,11 +63,10 @@ def generate_bitcoin_address(public_key_bytes, compressed=True):
     """Generate Bitcoin address from public key bytes"""
     # SHA256 + RIPEMD160
     sha256_hash = sha256(public_key_bytes)
-    ripemd160_hash = hashlib.new('ripemd160')
-    ripemd160_hash.update(sha256_hash)
+    ripemd160_hash = ripemd160(sha256_hash)
     
     # Add version byte (0x00 for mainnet)
-    version_ripemd160_hash = b'\x00' + ripemd160_hash.digest()
+    version_ripemd160_hash = b'\x00' + ripemd160_hash
     
     # Double SHA256 for checksum
     double_sha = sha256(sha256(version_ripemd160_hash))
@@ -44,8 +80,11 @@ def generate_bitcoin_address(public_key_bytes, compressed=True):
     return address
 
 def process_private_key(private_key_int):
-    """Process a single private key value"""
+    """Process a single private key value into compressed and uncompressed hash160s"""
     try:
+        if PROFILER and PROFILER.tick():
+            return (private_key_int, *profile_coincurve_key(PROFILER, private_key_int, ADDRESS_TYPES))
+        
         # Convert to bytes (32 bytes, big-endian)
         private_key_bytes = private_key_int.to_bytes(32, byteorder='big')
         
@@ -53,159 +92,289 @@ def process_private_key(private_key_int):
         private_key = PrivateKey(private_key_bytes)
         public_key = private_key.public_key
         
-        # Get compressed and uncompressed public keys
-        public_key_compressed = public_key.format(compressed=True)
-        public_key_uncompressed = public_key.format(compressed=False)
+        # Hash only the selected encodings; Base58 encoding is left for hits
+        hash_compressed = None
+        hash_uncompressed = None
+        if needs_compressed(ADDRESS_TYPES):
+            hash_compressed = hash160(public_key.format(compressed=True))
+        if needs_uncompressed(ADDRESS_TYPES):
+            hash_uncompressed = hash160(public_key.format(compressed=False))
+        
+        return private_key_int, hash_compressed, hash_uncompressed
         
-        # Generate addresses
-        address_compressed = generate_bitcoin_address(public_key_compressed, True)
-        address_uncompressed = generate_bitcoin_address(public_key_uncompressed, False)
+    except Exception as e:
+        return None
+
+def process_point(private_key_int, point):
+    """Process a private key whose public key point is already known"""
+    try:
+        if PROFILER and PROFILER.tick():
+            hash_compressed, hash_uncompressed = profile_point(PROFILER, point, ADDRESS_TYPES)
+        else:
+            hash_compressed, hash_uncompressed = derive_hashes(point, ADDRESS_TYPES)
         
-        return private_key_int, address_compressed, address_uncompressed
+        return private_key_int, hash_compressed, hash_uncompressed
         
     except Exception as e:
         return None
 
-def search_range(start_value, range_size, thread_id):
+def process_points(points):
+    """Yield process results for (private key, point) pairs, hashing through SHA256_ENGINE"""
+    if SHA256_ENGINE == "hashlib":
+        for private_key_int, point in points:
+            yield process_point(private_key_int, point)
+        return
+    
+    # Batch engines hash BATCH_SIZE pubkeys per call
+    points = iter(points)
+    while True:
+        chunk = list(islice(points, BATCH_SIZE))
+        if not chunk:
+            return
+        if any(point is None for _, point in chunk):
+            # The point at infinity has no pubkey; process_point reports it like a failed key
+            for private_key_int, point in chunk:
+                yield process_point(private_key_int, point)
+            continue
+        hashes = derive_hashes_batch([point for _, point in chunk], ADDRESS_TYPES, SHA256_ENGINE)
+        for (private_key_int, _), (hash_compressed, hash_uncompressed) in zip(chunk, hashes):
+            yield private_key_int, hash_compressed, hash_uncompressed
+
+def iter_results(start_value, range_size):
+    """Yield process results for a range using the configured scan mode"""
+    if SCAN_MODE == "scalar":
+        for private_key_int in range(start_value, start_value + range_size):
+            yield process_private_key(private_key_int)
+    elif SCAN_MODE == "batch":
+        # All inversions of a batch share one modular inversion
+        yield from process_points(batch_points(start_value, range_size, BATCH_SIZE))
+    else:
+        # One scalar multiplication per range, then one point addition per key
+        yield from process_points(sequential_points(start_value, range_size))
+
+def iter_center_out_results(start_offset, range_size):
+    """Yield process results for offsets on both sides of BASE_VALUE"""
+    # BASE_VALUE + d and BASE_VALUE - (d + 1) come out of the same inversion
+    yield from process_points(center_out_points(BASE_VALUE, start_offset, range_size, BATCH_SIZE))
+
+def search_range(start_value, range_size, unit_slot):
     """Search a range of values for the target address"""
-    end_value = start_value + range_size
-    current_value = start_value
-    last_report_time = time.time()
-    keys_checked = 0
-    
-    while current_value < end_value:
-        # Process current value
-        result = process_private_key(current_value)
+    return scan_results(iter_results(start_value, range_size), unit_slot)
+
+def search_center_out(start_offset, range_size, unit_slot):
+    """Search offsets [start_offset, start_offset + range_size) on both sides of BASE_VALUE"""
+    return scan_results(iter_center_out_results(start_offset, range_size), unit_slot)
+
+def scan_results(results, unit_slot):
+    """Check processed keys against the target hash160 and publish progress; returns keys checked"""
+    current_value = None
+    keys_checked = 0  # Keys checked in this work unit so far
+    
+    for result in results:
         if result:
-            priv_key, addr_comp, addr_uncomp = result
+            priv_key, hash_comp, hash_uncomp = result
+            current_value = priv_key
             
-            # Check if either address matches
-            if addr_comp == TARGET_ADDRESS or addr_uncomp == TARGET_ADDRESS:
-                result_queue.put(('FOUND', priv_key, addr_comp, addr_uncomp))
-                return
+            # Check if either hash160 is a target; addresses are only built for a hit
+            if hash_comp in TARGETS or hash_uncomp in TARGETS:
+                result_queue.put(('FOUND', priv_key, encode_addresses(hash_comp, hash_uncomp, ADDRESS_TYPES),
+                                  TARGETS.hits(hash_comp, hash_uncomp)))
+                return keys_checked
         
-        # Update progress
+        # Update progress: a few word writes into shared memory, no pickling or locks
         keys_checked += 1
-        if keys_checked % 1000 == 0:
-            current_time = time.time()
-            if current_time - last_report_time >= 10:  # Report every 10 seconds
-                progress_queue.put((thread_id, current_value, keys_checked))
-                last_report_time = current_time
-                keys_checked = 0
-        
-        current_value += 1
-
-def format_speed(keys_per_second):
-    """Format speed in a human-readable format"""
-    if keys_per_second >= 1_000_000:
-        return f"{keys_per_second/1_000_000:.2f}M keys/s"
-    elif keys_per_second >= 1_000:
-        return f"{keys_per_second/1_000:.2f}K keys/s"
-    else:
-        return f"{keys_per_second:.2f} keys/s"
-
-def progress_monitor():
-    """Monitor and display progress from all threads"""
-    thread_progress = {}
-    start_time = time.time()
+        if keys_checked % PUBLISH_EVERY == 0 and current_value is not None:
+            unit_counters.publish(unit_slot, keys_checked, current_value)
     
-    while True:
+    # Final publish so the monitor's totals include the whole unit
+    if current_value is not None:
+        unit_counters.publish(unit_slot, keys_checked, current_value)
+    if PROFILER:
+        result_queue.put(('PROFILE', PROFILER.drain()))
+    return keys_checked
+
+def progress_monitor(telemetry, counters, stop):
+    """Redraw the telemetry of all work units, sampled from the shared counters until stop is set"""
+    while not stop.wait(MONITOR_INTERVAL):
         try:
-            thread_id, current_value, keys_checked = progress_queue.get(timeout=1)
-            thread_progress[thread_id] = (current_value, keys_checked)
-            
-            # Calculate and display overall progress
-            elapsed_time = time.time() - start_time
-            total_keys = sum(checked for _, checked in thread_progress.values())
-            keys_per_second = total_keys / elapsed_time if elapsed_time > 0 else 0
-            
-            # Clear screen (platform independent)
-            os.system('cls' if os.name == 'nt' else 'clear')
-            
-            print(f"Progress Report:")
-            print(f"{'='*50}")
-            print(f"Running time: {elapsed_time:.1f}s")
-            print(f"Total keys checked: {total_keys:,}")
-            print(f"Speed: {format_speed(keys_per_second)}")
-            print(f"\nActive Threads:")
-            print(f"{'-'*50}")
-            for tid, (curr_val, _) in sorted(thread_progress.items()):
-                direction = "+" if tid.startswith("pos") else "-"
-                offset = abs(curr_val - BASE_VALUE)
-                print(f"Thread {tid:6}: {direction}0x{offset:x} from base")
-            
-        except queue.Empty:
-            continue
+            unit_progress = counters.snapshot()
+            telemetry.update(sum(checked for checked, _ in unit_progress), workers=unit_progress)
         except Exception as e:
             print(f"Error in progress monitor: {str(e)}")
             break
 
+def unit_frontier(keys_checked, remaining):
+    """Values of a unit known to be fully checked after keys_checked results"""
+    if SCAN_MODE != "center_out":
+        return min(keys_checked, remaining)
+    
+    # Center-out units yield two keys per offset, a whole ring of groups at a time
+    if keys_checked >= 2 * remaining:
+        return remaining
+    ring = 2 * BATCH_SIZE + 1
+    return keys_checked // (2 * ring) * ring
+
 def main():
-    print(f"Starting puzzle 67 scanner with {THREAD_COUNT} threads")
-    print(f"Target address: {TARGET_ADDRESS}")
+    global result_queue, TARGETS
+    
+    # A large target file is indexed once in shared memory for all workers
+    if TARGET_FILE:
+        TARGETS = TargetIndex.from_file(TARGET_FILE)
+    
+    print(f"Starting puzzle 67 scanner with {WORKER_COUNT} worker processes")
+    print(f"Targets: {', '.join(TARGETS.describe())}")
     print(f"Base value: 0x{BASE_VALUE:x}")
-    print(f"Range per thread: {RANGE_PER_THREAD:,}")
+    print(f"Work units: {WORK_UNITS} x {RANGE_PER_UNIT:,}")
+    print(f"Address types: {', '.join(ADDRESS_TYPES)}")
     print(f"{'='*50}")
     
-    # Start progress monitor
-    monitor_thread = threading.Thread(target=progress_monitor)
+    # Workers are processes, so matches go through a multiprocessing queue
+    result_queue = mp.Queue()
+    
+    # Work units as (unit id, search function, first value, size, key ranges covered)
+    units = []
+    if SCAN_MODE == "center_out":
+        # Each unit covers the same offsets on both sides of the base value
+        half_range = RANGE_PER_UNIT // 2
+        for i in range(WORK_UNITS):
+            units.append((f"pair_{i}", search_center_out, i * half_range, half_range,
+                          center_out_ranges(BASE_VALUE, i * half_range, half_range)))
+    else:
+        for i in range(WORK_UNITS // 2):
+            # Positive direction
+            first = BASE_VALUE + (i * RANGE_PER_UNIT)
+            units.append((f"pos_{i}", search_range, first, RANGE_PER_UNIT, [(first, first + RANGE_PER_UNIT)]))
+            
+            # Negative direction
+            first = BASE_VALUE - ((i + 1) * RANGE_PER_UNIT)
+            units.append((f"neg_{i}", search_range, first, RANGE_PER_UNIT, [(first, first + RANGE_PER_UNIT)]))
+    
+    # Skip what a previous run with the same parameters already checked
+    checkpoint = Checkpoint('puzzle67_scanner', {
+        'target_addresses': TARGETS.ledger_targets(), 'base_value': BASE_VALUE, 'scan_mode': SCAN_MODE,
+        'range_per_unit': RANGE_PER_UNIT, 'work_units': WORK_UNITS, 'address_types': ADDRESS_TYPES})
+    done_before = checkpoint.load() or {}
+    if done_before:
+        print(f"Resuming from {checkpoint.path} ({sum(done_before.values()):,} values already checked)")
+    
+    # Units any search already checked completely for this target are skipped
+    ledger = ScanLedger(TARGETS.ledger_targets(), ADDRESS_TYPES)
+    recorded = set()
+    for unit_id, _, _, size, key_ranges in units:
+        if not any(ledger.uncovered(start, end) for start, end in key_ranges):
+            done_before[unit_id] = size
+            recorded.add(unit_id)
+    if recorded:
+        print(f"Scan ledger: {len(recorded)} of {len(units)} work units already covered")
+    
+    # One progress slot per work unit, sampled by the monitor thread
+    counters = ProgressCounters(len(units))
+    keys_per_value = 2 if SCAN_MODE == "center_out" else 1  # Center-out units check two keys per offset
+    range_keys = sum(keys_per_value * (size - done_before.get(unit_id, 0)) for unit_id, _, _, size, _ in units)
+    telemetry = Telemetry("Puzzle 67 scanner", range_keys, worker_names=[unit[0] for unit in units],
+                          refresh=MONITOR_INTERVAL)
+    monitor_stop = threading.Event()
+    monitor_thread = threading.Thread(target=progress_monitor, args=(telemetry, counters, monitor_stop))
     monitor_thread.daemon = True
     monitor_thread.start()
     
-    # Start search threads
-    threads = []
-    for i in range(THREAD_COUNT // 2):
-        # Positive direction
-        start_pos = BASE_VALUE + (i * RANGE_PER_THREAD)
-        t_pos = threading.Thread(target=search_range, 
-                               args=(start_pos, RANGE_PER_THREAD, f"pos_{i}"))
-        threads.append(t_pos)
-        t_pos.start()
-        
-        # Negative direction
-        start_neg = BASE_VALUE - ((i + 1) * RANGE_PER_THREAD)
-        t_neg = threading.Thread(target=search_range, 
-                               args=(start_neg, RANGE_PER_THREAD, f"neg_{i}"))
-        threads.append(t_neg)
-        t_neg.start()
+    # Queue the work units on the pool
+    pool = mp.Pool(WORKER_COUNT, initializer=init_worker, initargs=(result_queue, counters, TARGETS))
+    tasks = {}
+    for unit_slot, (unit_id, search, first, size, _) in enumerate(units):
+        done = done_before.get(unit_id, 0)
+        if done < size:
+            tasks[unit_id] = pool.apply_async(search, (first + done, size - done, unit_slot))
+    pool.close()
+    
+    # Optional Prometheus endpoint (PUZZLE_METRICS_PORT); it reads the telemetry the monitor keeps
+    def unit_metrics():
+        pending = sum(not task.ready() for task in tasks.values())
+        return [Metric('puzzle_work_units_pending', 'gauge', "Work units not finished yet", [({}, pending)])]
+    
+    collectors = [lambda: telemetry_metrics(telemetry), lambda: checkpoint_metrics(checkpoint),
+                  lambda: queue_metrics({'results': result_queue}), unit_metrics]
+    if PROFILER:
+        collectors.append(lambda: stage_metrics(PROFILER.stage_seconds()))
+    metrics = serve_metrics(*collectors, labels={'searcher': 'puzzle67_scanner'})
+    
+    def save_checkpoint():
+        state = {}
+        for unit_slot, (unit_id, _, first, size, key_ranges) in enumerate(units):
+            done = done_before.get(unit_id, 0)
+            task = tasks.get(unit_id)
+            if task is not None and task.ready() and task.successful():
+                # Finished units return their exact key count
+                done += unit_frontier(task.get(), size - done)
+            else:
+                done += unit_frontier(counters.read(unit_slot)[0], size - done)
+            state[unit_id] = done
+            
+            # Fully checked units go into the shared ledger
+            if done >= size and unit_id not in recorded:
+                ledger.add_many(key_ranges)
+                recorded.add(unit_id)
+        checkpoint.save(state)
     
     # Monitor for results
     try:
-        while any(t.is_alive() for t in threads):
+        while True:
             try:
                 msg_type, *data = result_queue.get(timeout=1)
-                if msg_type == 'FOUND':
-                    priv_key, addr_comp, addr_uncomp = data
+                if msg_type == 'PROFILE':
+                    PROFILER.merge(*data)
+                elif msg_type == 'FOUND':
+                    priv_key, addresses, hits = data
+                    monitor_stop.set()
+                    monitor_thread.join()
                     print("\nMATCH FOUND!")
                     print(f"{'='*50}")
+                    for label, address in hits:
+                        print(f"Matched target {label}: {address}")
                     print(f"Private Key (hex): 0x{priv_key:x}")
                     print(f"Private Key (dec): {priv_key}")
-                    print(f"Compressed Addr:   {addr_comp}")
-                    print(f"Uncompressed Addr: {addr_uncomp}")
+                    for address_type, address in addresses.items():
+                        print(f"{address_type:18}: {address}")
                     
                     # Save to file
                     with open('puzzle67_solution.txt', 'w') as f:
+                        for label, address in hits:
+                            f.write(f"Matched target {label}: {address}\n")
                         f.write(f"Private Key (hex): 0x{priv_key:x}\n")
                         f.write(f"Private Key (dec): {priv_key}\n")
-                        f.write(f"Compressed Address: {addr_comp}\n")
-                        f.write(f"Uncompressed Address: {addr_uncomp}\n")
+                        for address_type, address in addresses.items():
+                            f.write(f"{address_type}: {address}\n")
                     
                     return
             except queue.Empty:
-                continue
+                if all(t.ready() for t in tasks.values()):
+                    print("\nNo match found in specified range")
+                    return
+            
+            # Persist each unit's checked frontier periodically
+            if checkpoint.due():
+                save_checkpoint()
             
     except KeyboardInterrupt:
         print("\nSearch interrupted by user")
     finally:
         # Cleanup
-        for t in threads:
-            t.join(timeout=1)
+        pool.terminate()
+        pool.join()
+        save_checkpoint()
+        monitor_stop.set()
+        monitor_thread.join()
+        counters.unlink()
+        if metrics:
+            metrics.close()
+        if isinstance(TARGETS, TargetIndex):
+            TARGETS.unlink()
 
 if __name__ == '__main__':
     # Print system info
     print(f"\nSystem Information:")
     print(f"{'='*50}")
-    print(f"CPU cores available: {cpu_count()}")
+    print(f"CPU cores available: {cpu_count()} ({WORKER_COUNT} usable)")
     print(f"Python executable: {os.path.realpath(sys.executable)}")
     print(f"Python version: {sys.version.split()[0]}")
     print(f"Operating System: {os.name}")
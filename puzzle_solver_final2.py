@@ -1,6 +1,7 @@
 from bitcoin import *
 import math
 from decimal import Decimal, getcontext
+from puzzle_targets import PUZZLE_TARGETS
 getcontext().prec = 100
 
 # Constants
@@ -83,11 +84,7 @@ class PuzzleSolver:
     
     def solve_puzzle(self, puzzle_number):
         """Solve puzzle with comprehensive output"""
-        target_addresses = {
-            67: "1BY8GQbnueYofwSuFAT3USAhGjPrkxDdW9",
-            68: "1MVDYgVaSN6iKKEsbzRUAYFrYJadLYZvvZ",
-            69: "19vkiEajfhuZ8bs8Zu2jgmC6oqZbWqhxhG"
-        }
+        target_addresses = PUZZLE_TARGETS
         
         if puzzle_number not in target_addresses:
             print(f"No target address known for puzzle {puzzle_number}")
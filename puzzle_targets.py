@@ -0,0 +1,73 @@
+"""Open puzzle addresses and multi-target hash160 matching.
+
+A scanner derives and hashes each key once and looks the digests up in a
+dict of target hash160s, so checking every open puzzle costs about the same
+as checking one. A hit is attributed to the puzzle whose address matched.
+"""
+from bitcoin_address import address_to_hash160
+
+# Unsolved puzzles and their addresses
+PUZZLE_TARGETS = {
+    67: "1BY8GQbnueYofwSuFAT3USAhGjPrkxDdW9",
+    68: "1MVDYgVaSN6iKKEsbzRUAYFrYJadLYZvvZ",
+    69: "19vkiEajfhuZ8bs8Zu2jgmC6oqZbWqhxhG",
+}
+
+def puzzle_range(puzzle_number):
+    """Keyspace [2^(n-1), 2^n) of puzzle n"""
+    return 2 ** (puzzle_number - 1), 2 ** puzzle_number
+
+class TargetSet:
+    def __init__(self, targets=PUZZLE_TARGETS):
+        """targets is {label: address}, a list of addresses, or a single address"""
+        if isinstance(targets, str):
+            targets = [targets]
+        if not isinstance(targets, dict):
+            targets = {address: address for address in targets}
+        self.targets = dict(targets)
+
+        # hash160 -> [(label, address)]; P2PKH and P2WPKH addresses of one key share a hash160
+        self.by_hash160 = {}
+        for label, address in self.targets.items():
+            self.by_hash160.setdefault(address_to_hash160(address), []).append((label, address))
+
+    def __len__(self):
+        return len(self.targets)
+
+    def __contains__(self, hash160):
+        return hash160 in self.by_hash160
+
+    def addresses(self):
+        """Target addresses in label order"""
+        return list(self.targets.values())
+
+    def hits(self, *hashes):
+        """Return [(label, address)] for every target matched by one of hashes"""
+        matched = []
+        for hash160 in hashes:
+            matched.extend(self.by_hash160.get(hash160, ()))
+        return matched
+
+    def describe(self):
+        """One line per target for startup banners"""
+        return [f"{label}: {address}" if label != address else address
+                for label, address in self.targets.items()]
+
+    def ledger_targets(self):
+        """Scan ledger tags for this target set: one per address"""
+        return self.addresses()
+
+def as_targets(targets):
+    """Use a TargetSet or TargetIndex as is; build a TargetSet from addresses otherwise"""
+    if hasattr(targets, 'hits'):
+        return targets
+    return TargetSet(targets)
+
+def targets_for_range(start, end, targets=PUZZLE_TARGETS):
+    """TargetSet of the puzzles in targets whose keyspace overlaps [start, end)"""
+    overlapping = {}
+    for puzzle_number, address in targets.items():
+        low, high = puzzle_range(puzzle_number)
+        if start < high and low < end:
+            overlapping[puzzle_number] = address
+    return TargetSet(overlapping)
@@ -0,0 +1,107 @@
+"""RIPEMD-160 that does not depend on the system OpenSSL.
+
+hashlib only offers RIPEMD-160 through OpenSSL, and OpenSSL 3 builds
+without the legacy provider refuse it, which used to make every hash160 of
+a search raise. ripemd160() uses hashlib when a probe at import shows it
+works and the pure-Python implementation below otherwise; batches of
+digests go through the NumPy lanes in hash_lanes.
+"""
+import hashlib
+import struct
+
+# Word order, rotation amounts and constants of the left and right lines (80 steps each)
+R_LEFT = [
+    0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10, 11, 12, 13, 14, 15,
+    7, 4, 13, 1, 10, 6, 15, 3, 12, 0, 9, 5, 2, 14, 11, 8,
+    3, 10, 14, 4, 9, 15, 8, 1, 2, 7, 0, 6, 13, 11, 5, 12,
+    1, 9, 11, 10, 0, 8, 12, 4, 13, 3, 7, 15, 14, 5, 6, 2,
+    4, 0, 5, 9, 7, 12, 2, 10, 14, 1, 3, 8, 11, 6, 15, 13,
+]
+R_RIGHT = [
+    5, 14, 7, 0, 9, 2, 11, 4, 13, 6, 15, 8, 1, 10, 3, 12,
+    6, 11, 3, 7, 0, 13, 5, 10, 14, 15, 8, 12, 4, 9, 1, 2,
+    15, 5, 1, 3, 7, 14, 6, 9, 11, 8, 12, 2, 10, 0, 4, 13,
+    8, 6, 4, 1, 3, 11, 15, 0, 5, 12, 2, 13, 9, 7, 10, 14,
+    12, 15, 10, 4, 1, 5, 8, 7, 6, 2, 13, 14, 0, 3, 9, 11,
+]
+S_LEFT = [
+    11, 14, 15, 12, 5, 8, 7, 9, 11, 13, 14, 15, 6, 7, 9, 8,
+    7, 6, 8, 13, 11, 9, 7, 15, 7, 12, 15, 9, 11, 7, 13, 12,
+    11, 13, 6, 7, 14, 9, 13, 15, 14, 8, 13, 6, 5, 12, 7, 5,
+    11, 12, 14, 15, 14, 15, 9, 8, 9, 14, 5, 6, 8, 6, 5, 12,
+    9, 15, 5, 11, 6, 8, 13, 12, 5, 12, 13, 14, 11, 8, 5, 6,
+]
+S_RIGHT = [
+    8, 9, 9, 11, 13, 15, 15, 5, 7, 7, 8, 11, 14, 14, 12, 6,
+    9, 13, 15, 7, 12, 8, 9, 11, 7, 7, 12, 7, 6, 15, 13, 11,
+    9, 7, 15, 11, 8, 6, 6, 14, 12, 13, 5, 14, 13, 13, 7, 5,
+    15, 5, 8, 11, 14, 14, 6, 14, 6, 9, 12, 9, 12, 5, 15, 8,
+    8, 5, 12, 9, 12, 5, 14, 6, 8, 13, 6, 5, 15, 13, 11, 11,
+]
+K_LEFT = [0x00000000, 0x5A827999, 0x6ED9EBA1, 0x8F1BBCDC, 0xA953FD4E]
+K_RIGHT = [0x50A28BE6, 0x5C4DD124, 0x6D703EF3, 0x7A6D76E9, 0x00000000]
+IV = (0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476, 0xC3D2E1F0)
+MASK = 0xFFFFFFFF
+
+def _compress(state, x):
+    """One 64-byte block; both lines run side by side, with the boolean functions inlined per round"""
+    al = ar = state[0]
+    bl = br = state[1]
+    cl = cr = state[2]
+    dl = dr = state[3]
+    el = er = state[4]
+    for round_index in range(5):
+        kl = K_LEFT[round_index]
+        kr = K_RIGHT[round_index]
+        for j in range(16 * round_index, 16 * round_index + 16):
+            # Left line: f0, f1, f2, f3, f4; right line: f4, f3, f2, f1, f0
+            if round_index == 0:
+                fl = bl ^ cl ^ dl
+                fr = br ^ (cr | ~dr & MASK)
+            elif round_index == 1:
+                fl = (bl & cl) | (~bl & dl)
+                fr = (br & dr) | (cr & ~dr)
+            elif round_index == 2:
+                fl = (bl | ~cl & MASK) ^ dl
+                fr = (br | ~cr & MASK) ^ dr
+            elif round_index == 3:
+                fl = (bl & dl) | (cl & ~dl)
+                fr = (br & cr) | (~br & dr)
+            else:
+                fl = bl ^ (cl | ~dl & MASK)
+                fr = br ^ cr ^ dr
+
+            t = (al + fl + x[R_LEFT[j]] + kl) & MASK
+            s = S_LEFT[j]
+            t = ((t << s | t >> (32 - s)) + el) & MASK
+            al, el, dl, cl, bl = el, dl, (cl << 10 | cl >> 22) & MASK, bl, t
+
+            t = (ar + fr + x[R_RIGHT[j]] + kr) & MASK
+            s = S_RIGHT[j]
+            t = ((t << s | t >> (32 - s)) + er) & MASK
+            ar, er, dr, cr, br = er, dr, (cr << 10 | cr >> 22) & MASK, br, t
+
+    return ((state[1] + cl + dr) & MASK, (state[2] + dl + er) & MASK, (state[3] + el + ar) & MASK,
+            (state[4] + al + br) & MASK, (state[0] + bl + cr) & MASK)
+
+def ripemd160_python(data):
+    """RIPEMD-160 digest of data in pure Python"""
+    padded = data + b'\x80' + b'\x00' * ((55 - len(data)) % 64) + struct.pack('<Q', len(data) * 8)
+    state = IV
+    for offset in range(0, len(padded), 64):
+        state = _compress(state, struct.unpack_from('<16I', padded, offset))
+    return struct.pack('<5I', *state)
+
+def _hashlib_ripemd160(data):
+    return hashlib.new('ripemd160', data).digest()
+
+def _hashlib_works():
+    """Whether hashlib's (OpenSSL's) RIPEMD-160 exists here and is correct"""
+    try:
+        return _hashlib_ripemd160(b"abc") == ripemd160_python(b"abc")
+    except ValueError:  # "unsupported hash type" without the legacy provider
+        return False
+
+# hashlib's C implementation when the local OpenSSL has it, pure Python otherwise
+HASHLIB_RIPEMD160 = _hashlib_works()
+ripemd160 = _hashlib_ripemd160 if HASHLIB_RIPEMD160 else ripemd160_python
@@ -0,0 +1,200 @@
+"""Persistent ledger of key ranges that have been fully checked.
+
+Every search script records the [start, end) ranges it finished, tagged by
+target address and address type, and asks the ledger for the gaps of a range
+before scanning it, so overlapping windows around similar centers are only
+checked once. Adjacent and overlapping ranges are merged on every write.
+
+Scripts that only derive addresses for keys passing a pattern filter record
+under their own pattern tag: their ranges are only skipped by runs of the
+same filter, while unfiltered coverage is skipped by everyone.
+
+Run this module to print the coverage of the puzzle 67 keyspace.
+"""
+import json
+import os
+import sys
+import time
+
+try:
+    import fcntl
+except ImportError:  # No advisory locks on Windows; writes are still atomic
+    fcntl = None
+
+LEDGER_FILE = "scan_ledger.json"
+
+# Puzzle 67 keyspace
+PUZZLE_67_LOW = 2 ** 66
+PUZZLE_67_HIGH = 2 ** 67
+
+def merge_intervals(intervals):
+    """Sort [start, end) intervals and merge overlapping and adjacent ones"""
+    merged = []
+    for start, end in sorted(intervals):
+        if start >= end:
+            continue
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+def intersect_intervals(a, b):
+    """Intersection of two merged interval lists"""
+    result = []
+    i = j = 0
+    while i < len(a) and j < len(b):
+        start = max(a[i][0], b[j][0])
+        end = min(a[i][1], b[j][1])
+        if start < end:
+            result.append([start, end])
+        if a[i][1] < b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return result
+
+def subtract_intervals(start, end, covered):
+    """Parts of [start, end) not in the merged interval list covered"""
+    gaps = []
+    for covered_start, covered_end in covered:
+        if covered_end <= start:
+            continue
+        if covered_start >= end:
+            break
+        if covered_start > start:
+            gaps.append((start, covered_start))
+        start = max(start, covered_end)
+    if start < end:
+        gaps.append((start, end))
+    return gaps
+
+def interval_total(intervals, low=None, high=None):
+    """Number of keys in a merged interval list, optionally clipped to [low, high)"""
+    total = 0
+    for start, end in intervals:
+        if low is not None:
+            start = max(start, low)
+        if high is not None:
+            end = min(end, high)
+        total += max(0, end - start)
+    return total
+
+def center_out_ranges(base_value, start_offset, count):
+    """Key ranges checked by center-out offsets [start_offset, start_offset + count) around base_value"""
+    return [(base_value + start_offset, base_value + start_offset + count),
+            (base_value - start_offset - count, base_value - start_offset)]
+
+def _tag(target_address, address_type, pattern=None):
+    if pattern:
+        return f"{target_address}:{address_type}:{pattern}"
+    return f"{target_address}:{address_type}"
+
+def load_ranges(path=LEDGER_FILE):
+    """Return {tag: merged intervals} stored in the ledger file"""
+    try:
+        with open(path) as f:
+            return json.load(f).get('ranges', {})
+    except (OSError, ValueError):
+        return {}
+
+class ScanLedger:
+    def __init__(self, target_addresses, address_types, pattern=None, path=LEDGER_FILE):
+        # One address or several checked in the same pass
+        if isinstance(target_addresses, str):
+            target_addresses = (target_addresses,)
+        self.target_addresses = tuple(target_addresses)
+        self.address_types = tuple(address_types)
+        # Name of the pre-filter, None when every key is hashed. A filtering search only hashes keys
+        # that pass its filter, so its ranges are recorded under a tag of their own: they count as
+        # covered for later runs of the same filter, never for a full scan
+        self.pattern = pattern
+        self.path = path
+
+    def covered(self):
+        """Merged ranges already checked for every target and address type of this search"""
+        ranges = load_ranges(self.path)
+        covered = None
+        for target_address in self.target_addresses:
+            for address_type in self.address_types:
+                intervals = list(ranges.get(_tag(target_address, address_type), []))
+                if self.pattern:
+                    intervals += ranges.get(_tag(target_address, address_type, self.pattern), [])
+                intervals = merge_intervals(intervals)
+                covered = intervals if covered is None else intersect_intervals(covered, intervals)
+        return covered or []
+
+    def uncovered(self, start, end):
+        """Return the [start, end) gaps of a range that still need checking"""
+        return subtract_intervals(start, end, self.covered())
+
+    def scan(self, start, end):
+        """Yield the keys of [start, end) no earlier run of this filter (or a full scan) covered.
+
+        Each gap is recorded as checked once the caller asks for the key after
+        it, so stopping early (a match) never records a partly checked gap.
+        """
+        for gap_start, gap_end in self.uncovered(start, end):
+            yield from range(gap_start, gap_end)
+            self.add(gap_start, gap_end)
+
+    def uncovered_offsets(self, base_value, start_offset, count):
+        """Offset gaps of a center-out unit: offset d is needed while base + d or base - (d + 1) is"""
+        covered = self.covered()
+        (pos_start, pos_end), (neg_start, neg_end) = center_out_ranges(base_value, start_offset, count)
+        above = [(start - base_value, end - base_value)
+                 for start, end in subtract_intervals(pos_start, pos_end, covered)]
+        below = [(base_value - end, base_value - start)
+                 for start, end in subtract_intervals(neg_start, neg_end, covered)]
+        return [tuple(gap) for gap in merge_intervals(above + below)]
+
+    def add(self, start, end):
+        """Record [start, end) as checked"""
+        self.add_many([(start, end)])
+
+    def add_many(self, intervals):
+        """Record several [start, end) ranges as checked in one write"""
+        intervals = [(start, end) for start, end in intervals if start < end]
+        if not intervals:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Several scanners may write at once: merge into the latest file under a lock
+        with open(f"{self.path}.lock", 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            ranges = load_ranges(self.path)
+            for target_address in self.target_addresses:
+                for address_type in self.address_types:
+                    tag = _tag(target_address, address_type, self.pattern)
+                    ranges[tag] = merge_intervals(ranges.get(tag, []) + [list(i) for i in intervals])
+
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump({'ranges': ranges, 'updated_at': time.time()}, f, separators=(',', ':'))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+
+def coverage_report(path=LEDGER_FILE, low=PUZZLE_67_LOW, high=PUZZLE_67_HIGH):
+    """Return {tag: (keys covered in [low, high), all keys recorded)} for every ledger tag"""
+    return {tag: (interval_total(intervals, low, high), interval_total(intervals))
+            for tag, intervals in sorted(load_ranges(path).items())}
+
+if __name__ == '__main__':
+    path = sys.argv[1] if len(sys.argv) > 1 else LEDGER_FILE
+    keyspace = PUZZLE_67_HIGH - PUZZLE_67_LOW
+
+    print(f"Scan ledger: {path}")
+    print(f"Puzzle 67 keyspace: [0x{PUZZLE_67_LOW:x}, 0x{PUZZLE_67_HIGH:x})")
+    print("=" * 70)
+    report = coverage_report(path)
+    if not report:
+        print("Nothing recorded yet")
+    for tag, (in_keyspace, recorded) in report.items():
+        kind = "pattern-filtered" if tag.count(':') > 1 else "full"
+        print(f"{tag} ({kind})")
+        print(f"  Recorded: {recorded:,} keys")
+        print(f"  Puzzle 67 coverage: {in_keyspace:,} keys ({in_keyspace / keyspace:.3e} of the keyspace)")
@@ -0,0 +1,30 @@
+"""Expanding-ring iteration for searches that widen a window around a center.
+
+Round m of an expanding search only has to visit the annulus between radius
+(m - 1) * width and m * width; everything inside was checked by the earlier
+rounds. Each ring is handed out in chunks that alternate between the + and
+- side, walking outwards, so both directions stay level with each other and
+the total work is linear in the final radius.
+"""
+import itertools
+
+DEFAULT_CHUNK = 10_000  # Keys per chunk before switching sides
+
+def ring_ranges(center, ring, width, chunk=DEFAULT_CHUNK):
+    """Yield the [start, end) key ranges of ring (1-based) around center.
+
+    The + side is [center + (ring - 1) * width, center + ring * width) and the
+    - side is [center - ring * width, center - (ring - 1) * width); chunks
+    alternate between them, moving away from the center.
+    """
+    inner = (ring - 1) * width
+    outer = ring * width
+    for low in range(inner, outer, chunk):
+        high = min(low + chunk, outer)
+        yield center + low, center + high
+        yield center - high, center - low
+
+def expanding_rings(center, width, chunk=DEFAULT_CHUNK, first_ring=1):
+    """Yield (ring, ranges) for rings first_ring, first_ring + 1, ... around center"""
+    for ring in itertools.count(first_ring):
+        yield ring, ring_ranges(center, ring, width, chunk)
@@ -1,114 +1,420 @@
-from bitcoin import *
 import multiprocessing as mp
+import os
+import sys
 from datetime import datetime
 import time
+from ec_stepping import batch_points, center_out_points, DEFAULT_BATCH_SIZE
+from bitcoin_address import derive_hashes, encode_addresses, DEFAULT_ADDRESS_TYPES
+from puzzle_targets import as_targets, PUZZLE_TARGETS
+from target_index import TargetIndex
+from work_scheduler import WorkScheduler, SchedulerLockError, split_unit
+from checkpoint import Checkpoint
+from scan_ledger import ScanLedger, center_out_ranges, PUZZLE_67_LOW, PUZZLE_67_HIGH
+from block_bitmap import BlockBitmap, DEFAULT_BLOCK_BITS, block_count, block_range
+from block_permutation import BlockPermutation
+from progress_counters import ProgressCounters, PUBLISH_EVERY
+from telemetry import Telemetry
+from metrics_server import serve_metrics, telemetry_metrics, checkpoint_metrics, queue_metrics, stage_metrics
+from stage_profiler import profiler_from_env, profile_point
 
-def check_range(start_value, count, target_address, result_queue, process_id):
-    """Check a range of values for matching address"""
-    last_report_time = time.time()
-    report_interval = 10  # Report every 10 seconds
-    
-    for offset in range(count):
-        test_value = start_value + offset
-        hex_val = hex(test_value)[2:].zfill(64)
+REPORT_INTERVAL = 1  # Seconds between telemetry redraws from the monitor
+PROFILER = profiler_from_env()  # PUZZLE_PROFILE=N times the stages of one key in N; workers send theirs to the monitor
+
+def check_range(start_value, count, targets, result_queue, process_id, batch_size=DEFAULT_BATCH_SIZE,
+                address_types=DEFAULT_ADDRESS_TYPES, progress=None):
+    """Check a range of values for addresses matching any target"""
+    # Public keys come from batched point stepping instead of a privtopub per key
+    points = batch_points(start_value, count, batch_size)
+    return check_points(points, targets, result_queue, process_id, address_types, progress)
+
+def check_center_out(base_value, start_offset, count, targets, result_queue, process_id,
+                     batch_size=DEFAULT_BATCH_SIZE, address_types=DEFAULT_ADDRESS_TYPES, progress=None):
+    """Check offsets [start_offset, start_offset + count) on both sides of base_value"""
+    # base_value + d and base_value - (d + 1) share one inversion
+    points = center_out_points(base_value, start_offset, count, batch_size)
+    return check_points(points, targets, result_queue, process_id, address_types, progress)
+
+def check_points(points, targets, result_queue, process_id, address_types=DEFAULT_ADDRESS_TYPES, progress=None):
+    """Check (private key, public key point) pairs against a TargetSet; True if found.
+
+    Progress is published to shared counters through progress (a ProgressWriter);
+    only matches and errors go through result_queue.
+    """
+    checked = -1
+    for checked, (test_value, pub) in enumerate(points):
+        if progress and checked and checked % PUBLISH_EVERY == 0:
+            progress.advance(PUBLISH_EVERY, test_value)
         
         try:
-            # Check both compressed and uncompressed
-            pub = privtopub(hex_val)
-            pub_compressed = compress(pub)
-            
-            addr = pubtoaddr(pub)
-            addr_compressed = pubtoaddr(pub_compressed)
+            # Only the selected encodings are serialized and hashed
+            if PROFILER and PROFILER.tick():
+                hash_compressed, hash_uncompressed = profile_point(PROFILER, pub, address_types)
+            else:
+                hash_compressed, hash_uncompressed = derive_hashes(pub, address_types)
             
-            # Check if either matches
-            if addr == target_address or addr_compressed == target_address:
-                result_queue.put(('FOUND', hex_val, addr, addr_compressed))
-                return
-            
-            # Report progress periodically
-            current_time = time.time()
-            if current_time - last_report_time > report_interval:
-                result_queue.put(('PROGRESS', process_id, hex_val, addr, addr_compressed))
-                last_report_time = current_time
+            # One dict lookup per digest covers every target
+            if hash_compressed in targets or hash_uncompressed in targets:
+                result_queue.put(('FOUND', hex(test_value)[2:].zfill(64),
+                                  encode_addresses(hash_compressed, hash_uncompressed, address_types),
+                                  targets.hits(hash_compressed, hash_uncompressed)))
+                return True
                 
         except Exception as e:
-            if offset % 1000 == 0:  # Report errors less frequently
-                result_queue.put(('ERROR', process_id, str(e), hex_val))
+            if checked % 1000 == 0:  # Report errors less frequently
+                result_queue.put(('ERROR', process_id, str(e), hex(test_value)[2:].zfill(64)))
             continue
+    
+    # Keys since the last publish
+    if progress and checked >= 0:
+        progress.advance(checked % PUBLISH_EVERY + 1, test_value)
+    if PROFILER:
+        result_queue.put(('PROFILE', PROFILER.drain()))
+    return False
+
+def scheduled_worker(scheduler, slot, base_value, range_per_direction, targets, result_queue, counters,
+                     batch_size=DEFAULT_BATCH_SIZE, center_out=True, address_types=DEFAULT_ADDRESS_TYPES):
+    """Claim and check work units until the scheduler runs dry"""
+    process_id = f"worker_{slot}"
+    progress = counters.writer(slot)
+    ledger = ScanLedger(targets.ledger_targets(), address_types)
+    speed = 0
+    
+    while True:
+        unit = scheduler.claim(slot, speed)
+        if unit is None:
+            return
+        start, count = unit
+        started = time.time()
+        
+        # Only the parts of the unit no earlier search has checked are scanned
+        if center_out:
+            # Offsets [start, start + count) on both sides of the base value
+            gaps = ledger.uncovered_offsets(base_value, start, count)
+            found = any(check_center_out(base_value, gap_start, gap_end - gap_start, targets, result_queue,
+                                         process_id, batch_size, address_types, progress)
+                        for gap_start, gap_end in gaps)
+            checked = center_out_ranges(base_value, start, count)
+        else:
+            checked = [(start_value, start_value + values)
+                       for start_value, values in split_unit(base_value, start, count, range_per_direction)]
+            gaps = [gap for range_start, range_end in checked for gap in ledger.uncovered(range_start, range_end)]
+            found = any(check_range(gap_start, gap_end - gap_start, targets, result_queue, process_id,
+                                    batch_size, address_types, progress)
+                        for gap_start, gap_end in gaps)
+        
+        if found:
+            # The unit stays in flight, so the checkpoint keeps it pending and a rerun finds the key again
+            return
+        ledger.add_many(checked)
+        scheduler.complete(slot)
+        
+        # Size the next unit from the offsets actually scanned
+        scanned = sum(gap_end - gap_start for gap_start, gap_end in gaps)
+        if scanned:
+            speed = scanned / max(time.time() - started, 1e-6)
+
+def bitmap_scope(targets, address_types):
+    """What a finished block of the bitmap was checked for"""
+    return list(targets.ledger_targets()) + list(address_types)
 
-def search_parallel(base_value, range_per_direction=1_000_000_000_000, processes=8):
+def random_block_worker(slot, bitmap_path, low, high, block_bits, targets, result_queue, counters,
+                        batch_size=DEFAULT_BATCH_SIZE, address_types=DEFAULT_ADDRESS_TYPES, max_blocks=None):
+    """Check random unvisited blocks of [low, high) until a match (or max_blocks blocks)"""
+    process_id = f"worker_{slot}"
+    progress = counters.writer(slot)
+    bitmap = BlockBitmap(bitmap_path, low, high, block_bits, bitmap_scope(targets, address_types))
+    ledger = ScanLedger(targets.ledger_targets(), address_types)
+    blocks_done = 0
+    
+    try:
+        while max_blocks is None or blocks_done < max_blocks:
+            # The claim is a lock on the block's bitmap byte; dying releases it
+            block = bitmap.claim_random()
+            if block is None:
+                return
+            start_value, count = bitmap.block_range(block)
+            
+            found = any(check_range(gap_start, gap_end - gap_start, targets, result_queue, process_id,
+                                    batch_size, address_types, progress)
+                        for gap_start, gap_end in ledger.uncovered(start_value, start_value + count))
+            if found:
+                bitmap.release(block)
+                return
+            
+            # The bitmap is the record; random blocks would only bloat the ledger with unmergeable ranges
+            bitmap.complete(block)
+            result_queue.put(('BLOCK', process_id, block, start_value))
+            blocks_done += 1
+    finally:
+        bitmap.close()
+
+def permuted_block_worker(slot, workers, key, low, high, block_bits, blocks_done, targets, result_queue, counters,
+                          batch_size=DEFAULT_BATCH_SIZE, address_types=DEFAULT_ADDRESS_TYPES):
+    """Check this slot's share of the keyed block permutation, counting finished blocks in blocks_done"""
+    process_id = f"worker_{slot}"
+    progress = counters.writer(slot)
+    permutation = BlockPermutation(block_count(low, high, block_bits), key)
+    ledger = ScanLedger(targets.ledger_targets(), address_types)
+    
+    for position, block in permutation.worker_blocks(slot, workers, blocks_done[slot]):
+        start_value, count = block_range(low, high, block_bits, block)
+        
+        found = any(check_range(gap_start, gap_end - gap_start, targets, result_queue, process_id,
+                                batch_size, address_types, progress)
+                    for gap_start, gap_end in ledger.uncovered(start_value, start_value + count))
+        if found:
+            return
+        
+        # The counter is the only coverage record: worker slot has finished its first blocks_done outputs
+        blocks_done[slot] += 1
+        result_queue.put(('BLOCK', process_id, block, start_value))
+
+def worker_telemetry(title, processes, range_keys):
+    """Telemetry block with one rate line per worker slot"""
+    return Telemetry(title, range_keys, worker_names=[f"worker_{slot}" for slot in range(processes)],
+                     refresh=REPORT_INTERVAL)
+
+def profile_metrics():
+    """Stage timings merged from the workers (none unless PUZZLE_PROFILE is set)"""
+    return stage_metrics(PROFILER.stage_seconds()) if PROFILER else []
+
+def report_progress(telemetry, counters):
+    """Redraw the telemetry from a sample of the shared counters"""
+    snapshot = counters.snapshot()
+    telemetry.update(sum(keys_checked for keys_checked, _ in snapshot), workers=snapshot)
+
+def report_message(telemetry, msg_type, *data):
+    """Print a worker message below the telemetry (or merge its stage timings); True if it reports a match"""
+    if msg_type == 'PROFILE':
+        PROFILER.merge(*data)
+        return False
+    
+    telemetry.detach()
+    if msg_type == 'FOUND':
+        priv_key, addresses, hits = data
+        print("\nMATCH FOUND!")
+        print(f"Private Key: {priv_key}")
+        for label, address in hits:
+            print(f"Matched target {label}: {address}")
+        for address_type, address in addresses.items():
+            print(f"{address_type}: {address}")
+        return True
+    
+    elif msg_type == 'BLOCK':
+        proc_id, block, start_value = data
+        print(f"\nProcess {proc_id} finished block {block:,} (0x{start_value:x})")
+    
+    elif msg_type == 'ERROR':
+        proc_id, error_msg, val = data
+        print(f"\nError in process {proc_id} at 0x{val}: {error_msg}")
+    
+    return False
+
+def report_restart(slot, exitcode):
+    print(f"\nworker_{slot} died (exit code {exitcode}), restarting")
+
+def monitor_workers(running_processes, start_worker, telemetry, counters, result_queue, metrics=None,
+                    on_dead=report_restart, checkpoint=None, save_checkpoint=None):
+    """Report worker messages and progress until a match or until every worker exits; True on a match.
+
+    A crashed worker's slot is passed to on_dead, then restarted with
+    start_worker. save_checkpoint runs whenever checkpoint is due and once
+    more after the workers are stopped, when none can change the state.
+    """
+    found = False
+    try:
+        while any(p.is_alive() for p in running_processes):
+            try:
+                if report_message(telemetry, *result_queue.get(timeout=REPORT_INTERVAL)):
+                    found = True
+                    break
+            except mp.queues.Empty:
+                pass
+            
+            # The counters can be sampled at any rate without touching the workers
+            if telemetry.due():
+                report_progress(telemetry, counters)
+            
+            for slot, p in enumerate(running_processes):
+                if not p.is_alive() and p.exitcode not in (0, None):
+                    on_dead(slot, p.exitcode)
+                    running_processes[slot] = start_worker(slot)
+            
+            if checkpoint and checkpoint.due():
+                save_checkpoint()
+    finally:
+        for p in running_processes:
+            p.terminate()
+            p.join()
+        counters.unlink()
+        if metrics:
+            metrics.close()
+        if save_checkpoint:
+            save_checkpoint()
+    return found
+
+def search_parallel(base_value, range_per_direction=1_000_000_000_000, processes=8, batch_size=DEFAULT_BATCH_SIZE,
+                    center_out=True, address_types=DEFAULT_ADDRESS_TYPES, targets=PUZZLE_TARGETS):
     """Search in parallel using multiple processes"""
-    target_address = "1BY8GQbnueYofwSuFAT3USAhGjPrkxDdW9"
+    # Every derived hash160 is checked against all targets at once (a TargetIndex for large sets)
+    targets = as_targets(targets)
     
     # Create a queue for results
     result_queue = mp.Queue()
+    counters = ProgressCounters(processes)  # Workers publish progress here; the queue only carries results
+    
+    # Work is handed out in small adaptive units instead of one slice per process.
+    # Center-out units cover both directions; otherwise the upper half of the
+    # offsets walks down from the base value.
+    total = range_per_direction if center_out else 2 * range_per_direction
+    
+    # Resume from the checkpoint of a previous run with the same parameters
+    checkpoint = Checkpoint('search_wide_range', {
+        'target_addresses': targets.ledger_targets(), 'base_value': base_value,
+        'range_per_direction': range_per_direction, 'center_out': center_out,
+        'address_types': address_types})
+    state = checkpoint.load() or {'next_offset': 0, 'pending': []}
+    scheduler = WorkScheduler(total, processes, next_offset=state['next_offset'], pending=state['pending'])
     
-    # Calculate range for each process
-    values_per_process = range_per_direction // (processes // 2)
+    def save_checkpoint():
+        next_offset, pending = scheduler.snapshot()
+        checkpoint.save({'next_offset': next_offset, 'pending': pending})
     
     print(f"Starting search with {processes} processes")
     print(f"Base value: 0x{base_value:x}")
     print(f"Range per direction: ±{range_per_direction:,}")
-    print(f"Values per process: {values_per_process:,}")
+    print(f"Work units: {scheduler.min_unit:,} to {scheduler.max_unit:,} offsets (~{scheduler.target_seconds}s each)")
+    print(f"Batch size: {batch_size:,}")
+    print(f"Address types: {', '.join(address_types)}")
+    print(f"Targets: {', '.join(targets.describe())}")
+    print(f"Checkpoint: {checkpoint.path}")
+    if state['next_offset'] or state['pending']:
+        print(f"Resuming at offset {state['next_offset']:,} with {len(state['pending'])} unfinished units")
     
-    # Start processes
-    running_processes = []
-    
-    # Start processes for positive direction
-    for i in range(processes // 2):
-        start = base_value + (i * values_per_process)
-        p = mp.Process(target=check_range, 
-                      args=(start, values_per_process, target_address, result_queue, f"pos_{i}"))
-        running_processes.append(p)
+    def start_worker(slot):
+        p = mp.Process(target=scheduled_worker,
+                      args=(scheduler, slot, base_value, range_per_direction, targets, result_queue, counters,
+                            batch_size, center_out, address_types))
         p.start()
+        return p
+    
+    # Start processes
+    running_processes = [start_worker(slot) for slot in range(processes)]
+    telemetry = worker_telemetry("Wide range search", processes, 2 * range_per_direction)
+    metrics = serve_metrics(lambda: (telemetry_metrics(telemetry) + checkpoint_metrics(checkpoint)
+                                     + queue_metrics({'results': result_queue}) + profile_metrics()),
+                            labels={'searcher': 'search_wide_range'})
     
-    # Start processes for negative direction
-    for i in range(processes // 2):
-        start = base_value - ((i + 1) * values_per_process)
-        p = mp.Process(target=check_range, 
-                      args=(start, values_per_process, target_address, result_queue, f"neg_{i}"))
-        running_processes.append(p)
+    def requeue(slot, exitcode):
+        # A crashed worker's unit goes back to the scheduler for someone else
+        unit = scheduler.requeue(slot)
+        if unit:
+            print(f"\nworker_{slot} died (exit code {exitcode}), requeued offsets {unit[0]:,}+{unit[1]:,}")
+        else:
+            report_restart(slot, exitcode)
+    
+    # Persist the completed frontier periodically
+    try:
+        found = monitor_workers(running_processes, start_worker, telemetry, counters, result_queue, metrics,
+                                on_dead=requeue, checkpoint=checkpoint, save_checkpoint=save_checkpoint)
+    except SchedulerLockError as e:
+        # A worker died holding the scheduler lock; the checkpoint was saved as the pool stopped
+        telemetry.detach()
+        print(f"\n{e}; stopped the search. Run it again to resume from {checkpoint.path}")
+        return
+    if not found:
+        print("\nNo match found in specified range")
+
+def search_random_blocks(low=PUZZLE_67_LOW, high=PUZZLE_67_HIGH, processes=8, block_bits=DEFAULT_BLOCK_BITS,
+                         bitmap_path=None, batch_size=DEFAULT_BATCH_SIZE,
+                         address_types=DEFAULT_ADDRESS_TYPES, targets=PUZZLE_TARGETS, blocks_per_worker=None):
+    """Check [low, high) in randomly chosen blocks, recording finished blocks in a shared bitmap"""
+    targets = as_targets(targets)
+    
+    # Created (or checked against these parameters) once here, before any worker opens it
+    bitmap = BlockBitmap(bitmap_path, low, high, block_bits, bitmap_scope(targets, address_types))
+    bitmap_path = bitmap.path
+    bitmap.close()
+    
+    result_queue = mp.Queue()
+    counters = ProgressCounters(processes)
+    
+    print(f"Starting random block search with {processes} processes")
+    print(f"Keyspace: [0x{low:x}, 0x{high:x})")
+    print(f"Block size: 2^{block_bits} keys")
+    print(f"Bitmap: {bitmap_path}")
+    print(f"Batch size: {batch_size:,}")
+    print(f"Address types: {', '.join(address_types)}")
+    print(f"Targets: {', '.join(targets.describe())}")
+    
+    def start_worker(slot):
+        p = mp.Process(target=random_block_worker,
+                      args=(slot, bitmap_path, low, high, block_bits, targets, result_queue, counters,
+                            batch_size, address_types, blocks_per_worker))
         p.start()
+        return p
     
-    # Monitor progress
-    found = False
-    while any(p.is_alive() for p in running_processes):
-        try:
-            msg_type, *data = result_queue.get(timeout=1)
-            
-            if msg_type == 'FOUND':
-                priv_key, addr_uncomp, addr_comp = data
-                print("\nMATCH FOUND!")
-                print(f"Private Key: {priv_key}")
-                print(f"Uncompressed Address: {addr_uncomp}")
-                print(f"Compressed Address: {addr_comp}")
-                found = True
-                break
-            
-            elif msg_type == 'PROGRESS':
-                proc_id, current_val, addr_uncomp, addr_comp = data
-                print(f"\nProcess {proc_id} at: 0x{current_val}")
-                print(f"Sample addresses:")
-                print(f"  Uncompressed: {addr_uncomp}")
-                print(f"  Compressed: {addr_comp}")
-            
-            elif msg_type == 'ERROR':
-                proc_id, error_msg, val = data
-                print(f"\nError in process {proc_id} at 0x{val}: {error_msg}")
-                
-        except mp.queues.Empty:
-            continue
-        
-        if found:
-            break
+    # Start processes
+    running_processes = [start_worker(slot) for slot in range(processes)]
+    telemetry = worker_telemetry("Random block search", processes, high - low)
+    metrics = serve_metrics(lambda: (telemetry_metrics(telemetry) + queue_metrics({'results': result_queue})
+                                     + profile_metrics()),
+                            labels={'searcher': 'search_wide_range'})
+    
+    # No checkpoint needed, the bitmap is the record; a crashed worker's block lock is gone with it
+    found = monitor_workers(running_processes, start_worker, telemetry, counters, result_queue, metrics)
+    if not found:
+        print("\nNo match found in the checked blocks")
+
+def search_permuted_blocks(key, low=PUZZLE_67_LOW, high=PUZZLE_67_HIGH, processes=8,
+                           block_bits=DEFAULT_BLOCK_BITS, batch_size=DEFAULT_BATCH_SIZE,
+                           address_types=DEFAULT_ADDRESS_TYPES, targets=PUZZLE_TARGETS):
+    """Check [low, high) block by block in the order of a permutation keyed by key"""
+    targets = as_targets(targets)
+    result_queue = mp.Queue()
+    counters = ProgressCounters(processes)
+    blocks = block_count(low, high, block_bits)
+    
+    # One counter per worker is the whole state; it resumes with the same key and process count
+    checkpoint = Checkpoint('search_permuted_blocks', {
+        'target_addresses': targets.ledger_targets(), 'key': key, 'low': low, 'high': high,
+        'block_bits': block_bits, 'processes': processes, 'address_types': address_types})
+    state = checkpoint.load() or {'blocks_done': [0] * processes}
+    blocks_done = mp.Array('q', state['blocks_done'])
     
-    # Cleanup
-    for p in running_processes:
-        p.terminate()
-        p.join()
+    def save_checkpoint():
+        checkpoint.save({'blocks_done': list(blocks_done)})
     
+    print(f"Starting permuted block search with {processes} processes")
+    print(f"Keyspace: [0x{low:x}, 0x{high:x})")
+    print(f"Blocks: {blocks:,} of 2^{block_bits} keys")
+    print(f"Permutation key: {key}")
+    print(f"Batch size: {batch_size:,}")
+    print(f"Address types: {', '.join(address_types)}")
+    print(f"Targets: {', '.join(targets.describe())}")
+    print(f"Checkpoint: {checkpoint.path}")
+    if any(state['blocks_done']):
+        print(f"Resuming after {sum(state['blocks_done']):,} finished blocks")
+    
+    def start_worker(slot):
+        p = mp.Process(target=permuted_block_worker,
+                      args=(slot, processes, key, low, high, block_bits, blocks_done, targets, result_queue, counters,
+                            batch_size, address_types))
+        p.start()
+        return p
+    
+    # Start processes
+    running_processes = [start_worker(slot) for slot in range(processes)]
+    telemetry = worker_telemetry("Permuted block search", processes, high - low)
+    metrics = serve_metrics(lambda: (telemetry_metrics(telemetry) + checkpoint_metrics(checkpoint)
+                                     + queue_metrics({'results': result_queue}) + profile_metrics()),
+                            labels={'searcher': 'search_wide_range'})
+    
+    # A crashed worker restarts at its counter, redoing only the block it was in
+    found = monitor_workers(running_processes, start_worker, telemetry, counters, result_queue, metrics,
+                            checkpoint=checkpoint, save_checkpoint=save_checkpoint)
     if not found:
-        print("\nNo match found in specified range")
+        print(f"\nNo match found in {sum(blocks_done):,} of {blocks:,} blocks")
 
 if __name__ == '__main__':
     # Our calculated base value
@@ -120,13 +426,38 @@ if __name__ == '__main__':
     # Use 8 processes by default
     num_processes = 8
     
+    # --random-blocks checks the whole puzzle 67 keyspace in random block order instead;
+    # --permutation=KEY does the same in a reproducible order without the bitmap
+    args = sys.argv[1:]
+    random_blocks = '--random-blocks' in args
+    if random_blocks:
+        args.remove('--random-blocks')
+    permutation_key = None
+    for arg in args:
+        if arg.startswith('--permutation'):
+            permutation_key = arg.partition('=')[2] or os.urandom(8).hex()
+            args.remove(arg)
+            break
+    
+    # Optional file of target addresses (one per line) instead of the open puzzles
+    targets = PUZZLE_TARGETS
+    if args:
+        targets = TargetIndex.from_file(args[0])
+    
     print("Starting wide range search...")
     print("=" * 50)
     
     try:
-        search_parallel(base_value, range_size, num_processes)
+        if permutation_key:
+            search_permuted_blocks(permutation_key, processes=num_processes, targets=targets)
+        elif random_blocks:
+            search_random_blocks(processes=num_processes, targets=targets)
+        else:
+            search_parallel(base_value, range_size, num_processes, targets=targets)
     except KeyboardInterrupt:
         print("\nSearch interrupted by user")
     except Exception as e:
         print(f"\nError: {str(e)}")
-
+    finally:
+        if isinstance(targets, TargetIndex):
+            targets.unlink()
@@ -0,0 +1,348 @@
+"""secp256k1 curve arithmetic shared by the scanners.
+
+Points are (x, y) tuples of ints in affine coordinates; None is the point at infinity.
+
+Scalar multiplication works in Jacobian coordinates (X, Y, Z) standing for
+(X/Z^2, Y/Z^3), so a whole ladder costs one modular inversion instead of
+one per doubling and addition. Multiples of G use a fixed-base table of
+d * 2^(wi) * G for every w-bit window i and d in 1..2^(w-1): a key is
+recoded into signed w-bit digits and costs one table lookup and one mixed
+addition per nonzero digit, with no doublings. The default table (10-bit
+windows, 13,312 points) is built on first use; larger ones, and tables for
+other fixed bases such as stride points, are generated once on disk by
+point_table.py and memory-mapped (PUZZLE_POINT_TABLES).
+
+Other bases go through the GLV endomorphism: (x, y) -> (beta * x, y) equals
+multiplying by lambda, so k * P = k1 * P + k2 * (beta * x, y) with k1 and k2
+of about 128 bits each, evaluated together in one interleaved wNAF ladder
+of half the length. Short scalars (the puzzle keys are 67 bits) skip the
+split and run a ladder only as long as the scalar itself.
+"""
+import os
+
+# Curve parameters
+P = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEFFFFFC2F
+N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+GX = 0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798
+GY = 0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8
+G = (GX, GY)
+
+# GLV endomorphism: (BETA * x, y) = LAMBDA * (x, y)
+BETA = 0x7AE96A2B657C07106E64479EAC3434E99CF0497512F58995C1396C28719501EE
+LAMBDA = 0x5363AD4CC05C30E0A5261C028812645A122E22EA20816678DF02967C1B23BD72
+# Short lattice basis {(A1, B1), (A2, B2)} for splitting k into k1 + k2 * LAMBDA
+A1 = 0x3086D221A7D46BCDE86C90E49284EB15
+B1 = -0xE4437ED6010E88286F547FA90ABFE4C3
+A2 = 0x114CA50F7A8E2F3F657C1108D9D44CFD8
+B2 = A1
+
+WINDOW_BITS = 10  # In-memory fixed-base window: 2^9 table points per window
+WNAF_WIDTH = 5  # Variable-base wNAF width: 8 odd multiples per point
+SHORT_SCALAR_BITS = 128  # Scalars up to the size of a GLV half are not split
+
+TABLES_ENV = "PUZZLE_POINT_TABLES"  # point_table.py files to map instead of building G's table
+
+# Fixed-base tables by base point; G's is loaded or built on first use
+_fixed_tables = {}
+
+def inverse(value, modulus=P):
+    """Modular inverse of value"""
+    return pow(value, -1, modulus)
+
+def batch_inverse(values):
+    """Invert every value modulo P using a single modular inversion"""
+    prefix = []
+    acc = 1
+    for value in values:
+        acc = acc * value % P
+        prefix.append(acc)
+    
+    inv = pow(acc, -1, P)
+    result = [0] * len(values)
+    for i in range(len(values) - 1, 0, -1):
+        result[i] = inv * prefix[i - 1] % P
+        inv = inv * values[i] % P
+    result[0] = inv
+    return result
+
+def point_negate(point):
+    """Negate a point"""
+    if point is None:
+        return None
+    return point[0], (P - point[1]) % P
+
+def point_double(point):
+    """Double a point"""
+    if point is None or point[1] == 0:
+        return None
+    x, y = point
+    lam = 3 * x * x * inverse(2 * y) % P
+    x3 = (lam * lam - 2 * x) % P
+    return x3, (lam * (x - x3) - y) % P
+
+def point_add(p1, p2):
+    """Add two points"""
+    if p1 is None:
+        return p2
+    if p2 is None:
+        return p1
+    x1, y1 = p1
+    x2, y2 = p2
+    if x1 == x2:
+        if (y1 + y2) % P == 0:
+            return None
+        return point_double(p1)
+    lam = (y2 - y1) * inverse(x2 - x1) % P
+    x3 = (lam * lam - x1 - x2) % P
+    return x3, (lam * (x1 - x3) - y1) % P
+
+def jacobian_double(point):
+    """Double a Jacobian point (a = 0 formulas)"""
+    if point is None:
+        return None
+    x, y, z = point
+    if y == 0:
+        return None
+    yy = y * y % P
+    s = 4 * x * yy % P
+    m = 3 * x * x % P
+    x3 = (m * m - 2 * s) % P
+    return x3, (m * (s - x3) - 8 * yy * yy) % P, 2 * y * z % P
+
+def jacobian_add_affine(point, affine):
+    """Add an affine point to a Jacobian point (mixed addition)"""
+    if point is None:
+        return affine[0], affine[1], 1
+    x1, y1, z1 = point
+    x2, y2 = affine
+    zz = z1 * z1 % P
+    h = (x2 * zz - x1) % P
+    r = (y2 * zz * z1 - y1) % P
+    if h == 0:
+        if r == 0:
+            return jacobian_double(point)
+        return None
+    hh = h * h % P
+    hhh = h * hh % P
+    v = x1 * hh % P
+    x3 = (r * r - hhh - 2 * v) % P
+    return x3, (r * (v - x3) - y1 * hhh) % P, z1 * h % P
+
+def to_affine(point):
+    """Affine (x, y) of a Jacobian point"""
+    if point is None:
+        return None
+    x, y, z = point
+    zinv = inverse(z)
+    zinv2 = zinv * zinv % P
+    return x * zinv2 % P, y * zinv2 * zinv % P
+
+def normalize(points):
+    """Affine versions of Jacobian points (none at infinity), one inversion for all"""
+    inverses = batch_inverse([z for _, _, z in points])
+    affine = []
+    for (x, y, _), zinv in zip(points, inverses):
+        zinv2 = zinv * zinv % P
+        affine.append((x * zinv2 % P, y * zinv2 * zinv % P))
+    return affine
+
+def signed_digits(k, bits=WINDOW_BITS):
+    """Recode k into digits in [-2^(bits-1), 2^(bits-1)], least significant first"""
+    digits = []
+    half = 1 << (bits - 1)
+    mask = (1 << bits) - 1
+    while k:
+        digit = k & mask
+        k >>= bits
+        if digit > half:
+            digit -= 1 << bits
+            k += 1
+        digits.append(digit)
+    return digits
+
+def window_count(window_bits):
+    """Signed windows needed for scalars below N (one more for the carry out of the top digit)"""
+    return (256 + window_bits) // window_bits
+
+def fixed_windows(base, window_bits):
+    """Yield, per window i, the affine [d * 2^(window_bits * i) * base for d in 1..2^(window_bits - 1)]"""
+    half = 1 << (window_bits - 1)
+    for _ in range(window_count(window_bits)):
+        multiples = []
+        point = None
+        for _ in range(half):
+            point = jacobian_add_affine(point, base)
+            multiples.append(point)
+        yield normalize(multiples)
+        base = to_affine(jacobian_double(point))  # 2 * half * base = 2^window_bits * base
+
+class FixedBaseTable:
+    """In-memory fixed-base table: windows[i][d - 1] = d * 2^(window_bits * i) * base"""
+    def __init__(self, base, window_bits=WINDOW_BITS):
+        self.base = base
+        self.window_bits = window_bits
+        self.windows = list(fixed_windows(base, window_bits))
+
+def register_table(table):
+    """Use a fixed-base table (FixedBaseTable or point_table.MappedTable) for multiples of its base"""
+    _fixed_tables[table.base] = table
+
+def fixed_table(point):
+    """The fixed-base table for point, or None; G's is mapped from PUZZLE_POINT_TABLES or built on first use"""
+    table = _fixed_tables.get(point)
+    if table is None and point == G:
+        paths = os.environ.get(TABLES_ENV)
+        if paths:
+            from point_table import load_tables
+            load_tables(paths.split(os.pathsep))
+        table = _fixed_tables.get(point)
+        if table is None:
+            table = FixedBaseTable(G)
+            register_table(table)
+    return table
+
+def g_table():
+    """The fixed-base table of G"""
+    return fixed_table(G)
+
+def table_multiply(k, table):
+    """k * table.base from a fixed-base table, as a Jacobian point"""
+    window_bits = table.window_bits
+    windows = table.windows
+    half = 1 << (window_bits - 1)
+    mask = (1 << window_bits) - 1
+    window = 0
+    result = None
+    while k:
+        # Next signed digit of k (as signed_digits)
+        digit = k & mask
+        k >>= window_bits
+        if digit > half:
+            digit -= 1 << window_bits
+            k += 1
+        if digit:
+            if digit > 0:
+                x2, y2 = windows[window][digit - 1]
+            else:
+                x2, y2 = windows[window][-digit - 1]
+                y2 = P - y2
+            if result is None:
+                result = x1, y1, z1 = x2, y2, 1
+            else:
+                # jacobian_add_affine inlined: this loop is the whole cost of a key
+                zz = z1 * z1 % P
+                h = (x2 * zz - x1) % P
+                r = (y2 * zz % P * z1 - y1) % P
+                if h == 0:
+                    result = jacobian_add_affine(result, (x2, y2))
+                    if result is not None:
+                        x1, y1, z1 = result
+                else:
+                    hh = h * h % P
+                    hhh = h * hh % P
+                    v = x1 * hh % P
+                    x1 = (r * r - hhh - 2 * v) % P
+                    y1 = (r * (v - x1) - y1 * hhh) % P
+                    z1 = z1 * h % P
+                    result = x1, y1, z1
+        window += 1
+    return result
+
+def base_multiply(k):
+    """k * G from G's fixed-base table, as a Jacobian point"""
+    return table_multiply(k, g_table())
+
+def wnaf(k, width=WNAF_WIDTH):
+    """Width-w non-adjacent form of k, least significant digit first"""
+    digits = []
+    window = 1 << width
+    while k:
+        if k & 1:
+            digit = k & (window - 1)
+            if digit >= window >> 1:
+                digit -= window
+            k -= digit
+        else:
+            digit = 0
+        digits.append(digit)
+        k >>= 1
+    return digits
+
+def odd_multiples(point, width=WNAF_WIDTH):
+    """Affine [1P, 3P, 5P, ..., (2^(width-1) - 1)P]"""
+    double = to_affine(jacobian_double((point[0], point[1], 1)))
+    multiples = [(point[0], point[1], 1)]
+    for _ in range((1 << (width - 2)) - 1):
+        multiples.append(jacobian_add_affine(multiples[-1], double))
+    return normalize(multiples)
+
+def wnaf_multiply(k, point, width=WNAF_WIDTH):
+    """k * point with a wNAF ladder, as a Jacobian point"""
+    multiples = odd_multiples(point, width)
+    result = None
+    for digit in reversed(wnaf(k, width)):
+        result = jacobian_double(result)
+        if digit > 0:
+            result = jacobian_add_affine(result, multiples[digit >> 1])
+        elif digit < 0:
+            x, y = multiples[-digit >> 1]
+            result = jacobian_add_affine(result, (x, P - y))
+    return result
+
+def glv_split(k):
+    """Return (k1, k2) with k1 + k2 * LAMBDA = k (mod N) and |k1|, |k2| around 2^128"""
+    c1 = (B2 * k + N // 2) // N
+    c2 = (-B1 * k + N // 2) // N
+    return k - c1 * A1 - c2 * A2, -c1 * B1 - c2 * B2
+
+def endomorphism(point):
+    """LAMBDA * point for the cost of one multiplication"""
+    return BETA * point[0] % P, point[1]
+
+def multi_multiply(terms, width=WNAF_WIDTH):
+    """Sum of k * point over (k, point) terms with one shared doubling ladder, as a Jacobian point"""
+    ladders = []
+    for k, point in terms:
+        if k < 0:
+            k, point = -k, point_negate(point)
+        if k:
+            ladders.append((wnaf(k, width), odd_multiples(point, width)))
+    result = None
+    for i in range(max((len(digits) for digits, _ in ladders), default=0) - 1, -1, -1):
+        result = jacobian_double(result)
+        for digits, multiples in ladders:
+            digit = digits[i] if i < len(digits) else 0
+            if digit > 0:
+                result = jacobian_add_affine(result, multiples[digit >> 1])
+            elif digit < 0:
+                x, y = multiples[-digit >> 1]
+                result = jacobian_add_affine(result, (x, P - y))
+    return result
+
+def glv_multiply(k, point, width=WNAF_WIDTH):
+    """k * point as k1 * point + k2 * endomorphism(point), as a Jacobian point"""
+    k1, k2 = glv_split(k)
+    return multi_multiply(((k1, point), (k2, endomorphism(point))), width)
+
+def point_multiply(k, point=G):
+    """Multiply a point by scalar k"""
+    k %= N
+    if k == 0 or point is None:
+        return None
+    table = fixed_table(point)
+    if table is not None:
+        return to_affine(table_multiply(k, table))
+
+    # Short scalars (and negated short scalars): a ladder as long as the scalar beats two 128-bit halves
+    if k.bit_length() <= SHORT_SCALAR_BITS:
+        return to_affine(wnaf_multiply(k, point))
+    if (N - k).bit_length() <= SHORT_SCALAR_BITS:
+        return point_negate(to_affine(wnaf_multiply(N - k, point)))
+    return to_affine(glv_multiply(k, point))
+
+def serialize_pubkey(point, compressed=True):
+    """Serialize a point as a SEC1 public key"""
+    x, y = point
+    if compressed:
+        return (b'\x03' if y & 1 else b'\x02') + x.to_bytes(32, 'big')
+    return b'\x04' + x.to_bytes(32, 'big') + y.to_bytes(32, 'big')
@@ -0,0 +1,266 @@
+"""Opt-in per-stage timing of the key -> address pipelines.
+
+Set PUZZLE_PROFILE=N and one key in every N goes through an instrumented
+copy of the pipeline that times each stage (scalar multiplication or EC
+stepping, pubkey serialization, SHA-256, RIPEMD-160, Base58) with
+perf_counter_ns. The wall time between two sampled keys, divided by N,
+gives the full cost per key; what the stages do not account for is loop
+overhead (and, for stepping pipelines, the amortized EC step). Timings go
+into log2 histograms that are printed at exit. Means are trimmed of the
+slowest 1% of samples (kept in a bounded reservoir per stage) so that a
+page fault or a context switch inside one sample does not skew the shares.
+
+Unsampled keys only pay a countdown decrement. Worker processes send
+their histograms to the parent with drain(), which merges them with
+merge().
+"""
+import atexit
+import hashlib
+import os
+import random
+import sys
+import time
+import base58
+from secp256k1 import serialize_pubkey
+from ripemd160 import ripemd160
+from bitcoin_address import needs_compressed, needs_uncompressed, MAINNET_P2PKH_VERSION
+
+PROFILE_ENV = "PUZZLE_PROFILE"
+BUCKETS = 40  # log2(ns) buckets: 1 ns up to ~18 minutes
+KEY_STAGE = "per key (wall)"
+OTHER_STAGE = "unaccounted (loop overhead, EC stepping)"
+FILTERED_KEY_STAGE = "per filter-passing key (wall)"
+FILTERED_OTHER_STAGE = "unaccounted (filter, loop overhead)"
+HIT_ONLY_STAGE = "base58 (hits only)"  # Timed for reference; not part of the per-key cost of raw-digest scanners
+RESERVOIR_SIZE = 4096  # Raw samples kept per stage for trimmed means and percentiles
+TRIM_FRACTION = 0.01  # Slowest share of samples left out of the means
+
+class StageProfiler:
+    def __init__(self, every, key_stage=KEY_STAGE, other_stage=OTHER_STAGE):
+        """Time one key in every every keys.
+
+        Pipelines that pre-filter keys tick only for keys that pass the filter
+        and name the wall-time stages accordingly (FILTERED_KEY_STAGE).
+        """
+        self.every = every
+        self.key_stage = key_stage
+        self.other_stage = other_stage
+        self.countdown = every
+        self.last_sample = None
+        self.histograms = {}
+        self.totals = {}
+        self.reservoirs = {}
+        self.random = random.Random()
+
+    def tick(self):
+        """Count one key; True when this key should be profiled"""
+        self.countdown -= 1
+        if self.countdown:
+            return False
+        self.countdown = self.every
+
+        # Average wall time per key since the previous sample
+        now = time.perf_counter_ns()
+        if self.last_sample is not None:
+            self.record(self.key_stage, (now - self.last_sample) // self.every)
+        self.last_sample = now
+        return True
+
+    def record(self, stage, ns):
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = [0] * BUCKETS
+            self.totals[stage] = 0
+            self.reservoirs[stage] = []
+        histogram[min(ns.bit_length(), BUCKETS - 1)] += 1
+        self.totals[stage] += ns
+
+        # Reservoir sampling: every sample so far is kept with equal probability
+        reservoir = self.reservoirs[stage]
+        if len(reservoir) < RESERVOIR_SIZE:
+            reservoir.append(ns)
+        else:
+            slot = self.random.randrange(sum(histogram))
+            if slot < RESERVOIR_SIZE:
+                reservoir[slot] = ns
+
+    def drain(self):
+        """Return the recorded timings (picklable) and start over"""
+        state = {'histograms': self.histograms, 'totals': self.totals, 'reservoirs': self.reservoirs}
+        self.histograms = {}
+        self.totals = {}
+        self.reservoirs = {}
+        self.last_sample = None  # Time between units is not key work
+        return state
+
+    def merge(self, state):
+        """Add timings drained from another process"""
+        for stage, histogram in state['histograms'].items():
+            mine = self.histograms.setdefault(stage, [0] * BUCKETS)
+            mine_samples, theirs_samples = sum(mine), sum(histogram)
+            for bucket, count in enumerate(histogram):
+                mine[bucket] += count
+            self.totals[stage] = self.totals.get(stage, 0) + state['totals'][stage]
+
+            # Keep both reservoirs in proportion to the samples they stand for
+            combined = self.reservoirs.get(stage, []), state['reservoirs'][stage]
+            if sum(len(reservoir) for reservoir in combined) <= RESERVOIR_SIZE:
+                self.reservoirs[stage] = combined[0] + combined[1]
+                continue
+            share = round(RESERVOIR_SIZE * mine_samples / (mine_samples + theirs_samples))
+            self.reservoirs[stage] = (self.random.sample(combined[0], min(share, len(combined[0]))) +
+                                      self.random.sample(combined[1], min(RESERVOIR_SIZE - share, len(combined[1]))))
+
+    def samples(self, stage):
+        return sum(self.histograms.get(stage, ()))
+
+    def mean(self, stage):
+        """Mean ns of stage per sampled key, without the slowest TRIM_FRACTION of samples"""
+        reservoir = sorted(self.reservoirs.get(stage, ()))
+        kept = reservoir[:len(reservoir) - int(len(reservoir) * TRIM_FRACTION)]
+        return sum(kept) / len(kept) if kept else 0.0
+
+    def percentile(self, stage, fraction):
+        """ns below which the given fraction of the stage's samples fall"""
+        reservoir = sorted(self.reservoirs.get(stage, ()))
+        if not reservoir:
+            return 0
+        return reservoir[min(int(fraction * len(reservoir)), len(reservoir) - 1)]
+
+    def stage_seconds(self):
+        """Estimated seconds spent per stage over all keys ({stage: seconds})"""
+        return {stage: self.totals[stage] * self.every / 1e9 for stage in self.totals if stage != self.key_stage}
+
+    def report(self):
+        """Per-stage summary and histograms as a list of lines"""
+        if not self.histograms:
+            return [f"Stage profile: no keys sampled (one in {self.every:,})"]
+        stages = [stage for stage in self.histograms if stage != self.key_stage]
+        per_key = self.mean(self.key_stage)
+        accounted = sum(self.mean(stage) for stage in stages if stage != HIT_ONLY_STAGE)
+
+        lines = [f"Stage profile (one key in {self.every:,} sampled)",
+                 f"{'stage':42} {'samples':>9} {'mean':>11} {'p50':>9} {'p99':>9} {'share':>7}"]
+        rows = [(stage, self.samples(stage), self.mean(stage), self.percentile(stage, 0.5),
+                 self.percentile(stage, 0.99)) for stage in stages]
+        if per_key:
+            rows.append((self.other_stage, self.samples(self.key_stage), max(per_key - accounted, 0.0), 0, 0))
+            rows.append((self.key_stage, self.samples(self.key_stage), per_key,
+                         self.percentile(self.key_stage, 0.5), self.percentile(self.key_stage, 0.99)))
+        total = per_key or accounted
+        for stage, samples, mean, p50, p99 in rows:
+            share = f"{mean / total:.1%}" if total and stage != HIT_ONLY_STAGE else "-"
+            lines.append(f"{stage:42} {samples:9,} {mean / 1000:9.2f}us {_format_ns(p50):>9} "
+                         f"{_format_ns(p99):>9} {share:>7}")
+
+        # log2 histograms: one column per power of two, scaled to the busiest bucket
+        lines.append("")
+        for stage in stages + ([self.key_stage] if per_key else []):
+            histogram = self.histograms[stage]
+            used = [bucket for bucket, count in enumerate(histogram) if count]
+            peak = max(histogram)
+            lines.append(f"{stage}:")
+            for bucket in range(used[0], used[-1] + 1):
+                bar = "#" * round(40 * histogram[bucket] / peak)
+                lines.append(f"  <={_format_ns(1 << bucket):>9} {histogram[bucket]:9,} {bar}")
+        return lines
+
+def _format_ns(ns):
+    if not ns:
+        return "-"
+    if ns >= 1_000_000:
+        return f"{ns / 1_000_000:.1f}ms"
+    if ns >= 1_000:
+        return f"{ns / 1_000:.1f}us"
+    return f"{ns}ns"
+
+def profiler_from_env(key_stage=KEY_STAGE, other_stage=OTHER_STAGE):
+    """StageProfiler sampling one key in PUZZLE_PROFILE keys, reported at exit; None when unset"""
+    every = os.environ.get(PROFILE_ENV)
+    if not every:
+        return None
+    profiler = StageProfiler(int(every), key_stage, other_stage)
+    pid = os.getpid()
+
+    # Forked workers inherit the handler; only the process that created the profiler reports
+    def report():
+        if os.getpid() == pid:
+            print("\n" + "\n".join(profiler.report()), file=sys.stderr)
+    atexit.register(report)
+    return profiler
+
+def _base58_address(digest):
+    return base58.b58encode_check(bytes([MAINNET_P2PKH_VERSION]) + digest).decode()
+
+def _hash_stages(profiler, serialized, clock, encode=_base58_address, encode_stage=HIT_ONLY_STAGE):
+    """Time SHA-256, RIPEMD-160 and Base58Check of one serialized pubkey; returns (hash160, address, clock)"""
+    sha = hashlib.sha256(serialized).digest()
+    now = time.perf_counter_ns()
+    profiler.record("sha256", now - clock)
+    clock = now
+
+    digest = ripemd160(sha)
+    now = time.perf_counter_ns()
+    profiler.record("ripemd160", now - clock)
+    clock = now
+
+    address = encode(digest)
+    now = time.perf_counter_ns()
+    profiler.record(encode_stage, now - clock)
+    return digest, address, now
+
+def profile_point(profiler, point, address_types):
+    """derive_hashes() with per-stage timings, for pipelines that step points"""
+    hash_compressed = hash_uncompressed = None
+    clock = time.perf_counter_ns()
+    for compressed, needed in ((True, needs_compressed(address_types)), (False, needs_uncompressed(address_types))):
+        if not needed:
+            continue
+        serialized = serialize_pubkey(point, compressed)
+        now = time.perf_counter_ns()
+        profiler.record("serialize", now - clock)
+        digest, _, clock = _hash_stages(profiler, serialized, now)
+        if compressed:
+            hash_compressed = digest
+        else:
+            hash_uncompressed = digest
+    return hash_compressed, hash_uncompressed
+
+def profile_coincurve_key(profiler, private_key_int, address_types):
+    """coincurve scalar multiplication plus derive_hashes() with per-stage timings"""
+    from coincurve import PrivateKey
+
+    clock = time.perf_counter_ns()
+    public_key = PrivateKey(private_key_int.to_bytes(32, byteorder='big')).public_key
+    now = time.perf_counter_ns()
+    profiler.record("scalar_multiply", now - clock)
+    clock = now
+
+    hash_compressed = hash_uncompressed = None
+    for compressed, needed in ((True, needs_compressed(address_types)), (False, needs_uncompressed(address_types))):
+        if not needed:
+            continue
+        serialized = public_key.format(compressed=compressed)
+        now = time.perf_counter_ns()
+        profiler.record("serialize", now - clock)
+        digest, _, clock = _hash_stages(profiler, serialized, now)
+        if compressed:
+            hash_compressed = digest
+        else:
+            hash_uncompressed = digest
+    return hash_compressed, hash_uncompressed
+
+def profile_backend_key(profiler, backend, private_key_int):
+    """hash160_to_address(backend.hash160(key)) split into its stages; returns the compressed address"""
+    clock = time.perf_counter_ns()
+    public_key = backend.public_key(private_key_int)
+    now = time.perf_counter_ns()
+    profiler.record("scalar_multiply", now - clock)
+    clock = now
+
+    serialized = backend.serialize(public_key, True)
+    now = time.perf_counter_ns()
+    profiler.record("serialize", now - clock)
+
+    _, address, _ = _hash_stages(profiler, serialized, now, encode_stage="base58")
+    return address
@@ -0,0 +1,161 @@
+"""Membership index for large target sets, shared read-only between processes.
+
+A target file is decoded once to hash160s, which are packed into a sorted
+array with a Bloom filter in front. Both live in one shared memory block,
+so every worker process attaches to the same bytes instead of holding a
+copy. A lookup costs one or two Bloom probes for almost every key; only
+Bloom hits fall through to the binary search over the sorted array.
+
+Layout of the shared block:
+    [Bloom filter bits][sorted 20-byte hash160s][1 byte address kind per hash160]
+"""
+import hashlib
+import struct
+from multiprocessing import shared_memory
+from bitcoin_address import address_to_hash160, hash160_to_address, hash160_to_p2wpkh, BECH32_HRP
+
+HASH160_SIZE = 20
+BLOOM_BITS_PER_TARGET = 16  # About 0.1% false positives with five probes
+MIN_BLOOM_BITS = 1 << 13
+
+# Bloom probes are the five little-endian 32-bit words of the hash160 (already uniformly distributed)
+_probe_words = struct.Struct('<5I').unpack
+
+# Address kind stored next to each hash160 so hits can be re-encoded
+KIND_P2PKH = 0
+KIND_P2WPKH = 1
+
+def load_target_file(path):
+    """Return {hash160: kind} for a file of addresses, one per line ('#' starts a comment)"""
+    targets = {}
+    with open(path) as f:
+        for line_number, line in enumerate(f, 1):
+            address = line.split('#', 1)[0].strip()
+            if not address:
+                continue
+            try:
+                hash160 = address_to_hash160(address)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: {e}")
+            kind = KIND_P2WPKH if address.lower().startswith(BECH32_HRP + "1") else KIND_P2PKH
+            targets[hash160] = kind
+    return targets
+
+def _bloom_size(count):
+    """Bloom filter size in bits: a power of two so probes are a mask"""
+    bits = MIN_BLOOM_BITS
+    while bits < count * BLOOM_BITS_PER_TARGET:
+        bits <<= 1
+    return bits
+
+class TargetIndex:
+    def __init__(self, targets, name=None):
+        """Build the index in a new shared memory block from {hash160: kind}"""
+        hashes = sorted(targets)
+        self.count = len(hashes)
+        self.bloom_bytes = _bloom_size(self.count) // 8
+        self.digest = hashlib.sha256(b''.join(hashes)).hexdigest()[:16]
+
+        size = self.bloom_bytes + self.count * (HASH160_SIZE + 1)
+        self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._attach_views()
+
+        mask = self.bloom_mask
+        for i, hash160 in enumerate(hashes):
+            for word in _probe_words(hash160):
+                bit = word & mask
+                self.bloom[bit >> 3] |= 1 << (bit & 7)
+            self.sorted_hashes[i * HASH160_SIZE:(i + 1) * HASH160_SIZE] = hash160
+            self.kinds[i] = targets[hash160]
+
+    @classmethod
+    def from_file(cls, path):
+        """Decode a target address file and build a shared index from it"""
+        return cls(load_target_file(path))
+
+    def _attach_views(self):
+        buf = self.shm.buf
+        hashes_end = self.bloom_bytes + self.count * HASH160_SIZE
+        self.bloom = buf[:self.bloom_bytes]
+        self.bloom_mask = self.bloom_bytes * 8 - 1
+        self.sorted_hashes = buf[self.bloom_bytes:hashes_end]
+        self.kinds = buf[hashes_end:hashes_end + self.count]
+
+    def __getstate__(self):
+        # Worker processes attach to the block by name instead of copying it
+        return {'name': self.shm.name, 'count': self.count, 'bloom_bytes': self.bloom_bytes,
+                'digest': self.digest}
+
+    def __setstate__(self, state):
+        self.count = state['count']
+        self.bloom_bytes = state['bloom_bytes']
+        self.digest = state['digest']
+        self.shm = shared_memory.SharedMemory(name=state['name'])
+        self._attach_views()
+
+    def __len__(self):
+        return self.count
+
+    def _find(self, hash160):
+        """Position of hash160 in the sorted array, or -1"""
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            entry = bytes(self.sorted_hashes[mid * HASH160_SIZE:(mid + 1) * HASH160_SIZE])
+            if entry == hash160:
+                return mid
+            if entry < hash160:
+                low = mid + 1
+            else:
+                high = mid
+        return -1
+
+    def __contains__(self, hash160):
+        if hash160 is None:
+            return False
+        bloom = self.bloom
+        mask = self.bloom_mask
+        for word in _probe_words(hash160):
+            bit = word & mask
+            if not bloom[bit >> 3] >> (bit & 7) & 1:
+                return False
+        return self._find(hash160) >= 0
+
+    def _address(self, position):
+        hash160 = bytes(self.sorted_hashes[position * HASH160_SIZE:(position + 1) * HASH160_SIZE])
+        if self.kinds[position] == KIND_P2WPKH:
+            return hash160_to_p2wpkh(hash160)
+        return hash160_to_address(hash160)
+
+    def hits(self, *hashes):
+        """Return [(label, address)] for every target matched by one of hashes"""
+        matched = []
+        for hash160 in hashes:
+            if hash160 in self:
+                address = self._address(self._find(hash160))
+                matched.append((address, address))
+        return matched
+
+    def addresses(self):
+        """Every target address (re-encoded from the index)"""
+        return [self._address(i) for i in range(self.count)]
+
+    def describe(self):
+        """Summary for startup banners"""
+        return [f"{self.count:,} indexed targets ({self.digest})"]
+
+    def ledger_targets(self):
+        """Scan ledger tag for this target set: one tag for the whole index"""
+        return [f"index:{self.digest}"]
+
+    def close(self):
+        """Detach this process from the shared block"""
+        self.bloom.release()
+        self.sorted_hashes.release()
+        self.kinds.release()
+        self.shm.close()
+
+    def unlink(self):
+        """Close and free the shared block (the creating process calls this once)"""
+        self.close()
+        self.shm.unlink()
@@ -1,7 +1,10 @@
-from bitcoin import *
 from decimal import Decimal, getcontext
 import time
 from datetime import datetime
+from scan_ledger import ScanLedger
+from bitcoin_address import hash160_to_address, DEFAULT_ADDRESS_TYPES
+from key_backends import select_backend
+from metrics_server import serve_metrics, searcher_metrics
 
 # Set precision
 getcontext().prec = 1000
@@ -13,6 +16,8 @@ class TargetedSearch:
         self.TARGET_ADDRESS = "1BY8GQbnueYofwSuFAT3USAhGjPrkxDdW9"
         self.keys_checked = 0
         self.start_time = time.time()
+        self.backend = select_backend()
+        self.ledger = ScanLedger(self.TARGET_ADDRESS, DEFAULT_ADDRESS_TYPES, pattern='targeted_search')
         
         # Calculate expected value range
         self.ratio_66_68 = Decimal(self.PUZZLE_68) / Decimal(self.PUZZLE_66)
@@ -47,12 +52,10 @@ class TargetedSearch:
     def verify_address(self, value):
         """Generate and verify address"""
         try:
-            hex_val = hex(value)[2:].zfill(64)
-            pub = privtopub(hex_val)
-            pub_compressed = compress(pub)
+            hash_compressed, hash_uncompressed = self.backend.hash160s(value, DEFAULT_ADDRESS_TYPES)
             
-            addr = pubtoaddr(pub)
-            addr_compressed = pubtoaddr(pub_compressed)
+            addr = hash160_to_address(hash_uncompressed)
+            addr_compressed = hash160_to_address(hash_compressed)
             
             return addr, addr_compressed
         except:
@@ -78,8 +81,7 @@ class TargetedSearch:
         last_update = time.time()
         
         # Search around expected value
-        for offset in range(-range_size, range_size + 1):
-            test_value = self.expected_67 + offset
+        for test_value in self.ledger.scan(self.expected_67 - range_size, self.expected_67 + range_size + 1):
             self.keys_checked += 1
             
             # Progress update
@@ -146,5 +148,7 @@ class TargetedSearch:
 
 if __name__ == '__main__':
     searcher = TargetedSearch()
+    print(f"Key backend: {searcher.backend.name}")
+    serve_metrics(lambda: searcher_metrics(searcher), labels={'searcher': 'targeted_search'})
     searcher.expand_search()
 
@@ -0,0 +1,188 @@
+"""Progress telemetry for the search scripts.
+
+Hot loops only count keys and look at the clock every SAMPLE_EVERY keys;
+Telemetry turns (time, keys) samples into 10s, 60s and lifetime rates,
+per-worker rates, filter pass rates and ETAs for the configured range and
+for the whole puzzle 67 keyspace. The block of lines is redrawn in place
+with ANSI cursor codes on a terminal (no screen clearing subprocess), and
+printed as plain lines when output is redirected.
+"""
+import collections
+import sys
+import threading
+import time
+from scan_ledger import PUZZLE_67_LOW, PUZZLE_67_HIGH
+
+SAMPLE_EVERY = 4096  # Keys between clock reads in hot loops
+RATE_WINDOWS = (10, 60)  # Seconds
+DEFAULT_REFRESH = 1.0  # Seconds between redraws
+PUZZLE_67_KEYS = PUZZLE_67_HIGH - PUZZLE_67_LOW
+
+def format_speed(keys_per_second):
+    """Format speed in a human-readable format"""
+    if keys_per_second >= 1_000_000:
+        return f"{keys_per_second/1_000_000:.2f}M keys/s"
+    elif keys_per_second >= 1_000:
+        return f"{keys_per_second/1_000:.2f}K keys/s"
+    else:
+        return f"{keys_per_second:.2f} keys/s"
+
+def format_duration(seconds):
+    """Format an ETA: d hh:mm:ss, or years once it gets that far"""
+    if seconds is None:
+        return "unknown"
+    if seconds >= 365 * 86400:
+        return f"{seconds / (365.25 * 86400):.3g} years"
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    clock = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{days}d {clock}" if days else clock
+
+class RateMeter:
+    """Keys/s over sliding windows and since the start, from (time, total keys) samples.
+
+    The metrics endpoint reads rates on its own thread while the monitor adds
+    samples, so both go through a lock.
+    """
+    def __init__(self, keys_checked=0, windows=RATE_WINDOWS, now=None):
+        now = time.time() if now is None else now
+        self.windows = windows
+        self.start = (now, keys_checked)
+        self.samples = collections.deque([self.start])
+        self.lock = threading.Lock()
+
+    def add(self, keys_checked, now=None):
+        now = time.time() if now is None else now
+        with self.lock:
+            self.samples.append((now, keys_checked))
+
+            # Keep one sample older than the longest window as its anchor
+            horizon = now - max(self.windows)
+            while len(self.samples) > 2 and self.samples[1][0] <= horizon:
+                self.samples.popleft()
+
+    def rate(self, window=None):
+        """Keys/s over the last window seconds (None: since the start)"""
+        with self.lock:
+            end_time, end_keys = self.samples[-1]
+            if window is None:
+                start_time, start_keys = self.start
+            else:
+                start_time, start_keys = self.samples[0]
+                for sample_time, sample_keys in self.samples:
+                    if sample_time > end_time - window:
+                        break
+                    start_time, start_keys = sample_time, sample_keys
+        elapsed = end_time - start_time
+        return (end_keys - start_keys) / elapsed if elapsed > 0 else 0.0
+
+class Telemetry:
+    def __init__(self, title, range_keys=None, keys_checked=0, worker_names=(), refresh=DEFAULT_REFRESH,
+                 stream=None):
+        """range_keys is the size of the configured range; keys_checked is where a resumed run starts"""
+        self.title = title
+        self.range_keys = range_keys
+        self.worker_names = list(worker_names)
+        self.refresh = refresh
+        self.stream = stream or sys.stdout
+        self.in_place = hasattr(self.stream, 'isatty') and self.stream.isatty()
+
+        now = time.time()
+        self.keys_checked = keys_checked
+        self.meter = RateMeter(keys_checked, now=now)
+        self.worker_meters = [RateMeter(now=now) for _ in self.worker_names]
+        self.worker_state = [(0, None)] * len(self.worker_names)
+        self.position = None
+        self.filters = {}
+        self.details = {}
+        self.range_done = None
+        self.last_draw = 0.0
+        self.drawn_lines = 0
+
+    def due(self):
+        """Whether a redraw is due (one clock read)"""
+        return time.time() - self.last_draw >= self.refresh
+
+    def update(self, keys_checked, position=None, workers=None, filters=None, range_done=None, details=None):
+        """Record a sample and redraw.
+
+        workers is [(keys checked, position)] per worker name, filters is
+        {filter name: keys passed}, range_done the keys of the configured
+        range checked so far (defaults to the keys checked by this run) and
+        details {label: value} for extra lines.
+        """
+        now = time.time()
+        self.keys_checked = keys_checked
+        self.meter.add(keys_checked, now)
+        if position is not None:
+            self.position = position
+        if workers is not None:
+            self.worker_state = list(workers)
+            for meter, (worker_keys, _) in zip(self.worker_meters, self.worker_state):
+                meter.add(worker_keys, now)
+        if filters is not None:
+            self.filters = dict(filters)
+        if details is not None:
+            self.details = dict(details)
+        self.range_done = range_done
+        self.draw()
+
+    def eta(self, remaining):
+        """Seconds to check remaining keys at the 60s rate"""
+        rate = self.meter.rate(RATE_WINDOWS[-1])
+        if rate <= 0:
+            return None
+        return max(remaining, 0) / rate
+
+    def lines(self):
+        """The telemetry block as a list of lines"""
+        rates = [f"{window}s {format_speed(self.meter.rate(window))}" for window in RATE_WINDOWS]
+        rates.append(f"lifetime {format_speed(self.meter.rate())}")
+        elapsed = self.meter.samples[-1][0] - self.meter.start[0]
+        lines = [f"{self.title} | {format_duration(elapsed)} elapsed",
+                 f"Keys checked: {self.keys_checked:,} | " + " | ".join(rates)]
+        if self.position is not None:
+            lines.append(f"Current: 0x{self.position:x}")
+        lines.extend(f"{label}: {value}" for label, value in self.details.items())
+
+        for name, passed in self.filters.items():
+            share = passed / self.keys_checked if self.keys_checked else 0.0
+            lines.append(f"Filter {name}: {passed:,} passed ({share:.4%})")
+
+        if self.range_keys:
+            done = self.range_done
+            if done is None:
+                done = self.keys_checked - self.meter.start[1]
+            lines.append(f"Range: {done / self.range_keys:.2%} of {self.range_keys:,} keys | "
+                         f"ETA {format_duration(self.eta(self.range_keys - done))}")
+        lines.append(f"Puzzle 67 keyspace [2^66, 2^67): ETA {format_duration(self.eta(PUZZLE_67_KEYS))}")
+
+        for name, meter, (worker_keys, worker_position) in zip(self.worker_names, self.worker_meters,
+                                                               self.worker_state):
+            if worker_position is None and not worker_keys:
+                continue  # Not started yet
+            line = f"  {name}: {format_speed(meter.rate(RATE_WINDOWS[0]))} | {worker_keys:,} keys"
+            if worker_position is not None:
+                line += f" | 0x{worker_position:x}"
+            lines.append(line)
+        return lines
+
+    def draw(self):
+        """Redraw the block over the previous one (or print it when not on a terminal)"""
+        lines = self.lines()
+        out = []
+        if self.in_place and self.drawn_lines:
+            out.append(f"\033[{self.drawn_lines}F\033[J")  # Back to the first line of the block, clear below
+        out.extend(line + "\n" for line in lines)
+        if not self.in_place:
+            out.append("\n")
+        self.stream.write("".join(out))
+        self.stream.flush()
+        self.drawn_lines = len(lines)
+        self.last_draw = time.time()
+
+    def detach(self):
+        """Leave the current block on screen; other output follows and the next draw starts below it"""
+        self.drawn_lines = 0
@@ -1,10 +1,11 @@
 import hashlib
 import base58
 from binascii import hexlify, unhexlify
+from ripemd160 import ripemd160
 
 def hash160(hex_str):
     sha = hashlib.sha256(unhexlify(hex_str)).digest()
-    rip = hashlib.new('ripemd160', sha).digest()
+    rip = ripemd160(sha)
     return rip
 
 def hex_to_address(hex_str, version_byte=0):
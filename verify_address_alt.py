@@ -3,13 +3,11 @@ from cryptography.hazmat.primitives import serialization
 import hashlib
 import base58
 import binascii
+from ripemd160 import ripemd160
 
 def sha256(data):
     return hashlib.sha256(data).digest()
 
-def ripemd160(data):
-    return hashlib.new('ripemd160', data).digest()
-
 def hash160(data):
     return ripemd160(sha256(data))
 
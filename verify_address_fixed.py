@@ -2,6 +2,7 @@ from bitcointx.core.key import CPubKey
 from bitcointx.wallet import CBitcoinAddress
 import hashlib
 import base58
+from ripemd160 import ripemd160 as ripemd160_digest
 
 def pubkey_to_address(pubkey_hex):
     # Add version byte (0x00 for mainnet)
@@ -9,7 +10,7 @@ def pubkey_to_address(pubkey_hex):
     
     # Double SHA256 and RIPEMD160
     sha256_1 = hashlib.sha256(bytes.fromhex(pubkey_hex)).digest()
-    ripemd160 = hashlib.new('ripemd160', sha256_1).digest()
+    ripemd160 = ripemd160_digest(sha256_1)
     
     # Add version byte
     vh160 = version + ripemd160
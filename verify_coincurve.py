@@ -1,12 +1,10 @@
 from coincurve import PublicKey
 from hashlib import sha256
-import hashlib
 import base58
+from ripemd160 import ripemd160
 
 def sha256_ripemd160(x):
-    h = hashlib.new('ripemd160')
-    h.update(sha256(x).digest())
-    return h.digest()
+    return ripemd160(sha256(x).digest())
 
 def pubkey_to_address(pubkey_bytes):
     # Get RIPEMD160(SHA256()) hash
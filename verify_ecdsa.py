@@ -1,6 +1,7 @@
 import hashlib
 import ecdsa
 import base58
+from ripemd160 import ripemd160
 
 def privatekey_to_address(private_key_hex):
     # Convert to signing key
@@ -15,9 +16,7 @@ def privatekey_to_address(private_key_hex):
     sha256_hash = hashlib.sha256(bytes.fromhex(public_key_hex)).digest()
     
     # Perform RIPEMD-160 hashing on the result of SHA-256
-    ripemd160_hash = hashlib.new('ripemd160')
-    ripemd160_hash.update(sha256_hash)
-    ripemd160_hash = ripemd160_hash.digest()
+    ripemd160_hash = ripemd160(sha256_hash)
     
     # Add version byte in front (0x00 for mainnet)
     version_ripemd160_hash = b'\x00' + ripemd160_hash
@@ -1,10 +1,6 @@
-import subprocess
 import hashlib
 import base58
-
-def ripemd160(data):
-    proc = subprocess.Popen(['openssl', 'dgst', '-ripemd160', '-binary'], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
-    return proc.communicate(data)[0]
+from ripemd160 import ripemd160
 
 def hex_to_address(hex_str):
     # Convert hex to bytes
@@ -1,6 +1,7 @@
 import hashlib
 import base58
 import binascii
+from ripemd160 import ripemd160
 
 def hex_to_bytes(hex_str):
     return binascii.unhexlify(hex_str.zfill(64))
@@ -40,7 +41,7 @@ def verify_address_from_pubkey(pubkey_hex, compressed=True):
     sha256_hash = hashlib.sha256(pubkey_bytes).digest()
     
     # Perform RIPEMD-160
-    ripemd160_hash = hashlib.new('ripemd160', sha256_hash).digest()
+    ripemd160_hash = ripemd160(sha256_hash)
     
     # Add version byte
     version_ripemd160_hash = b'\x00' + ripemd160_hash
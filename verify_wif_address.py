@@ -1,14 +1,10 @@
 import hashlib
 import base58
+from ripemd160 import ripemd160
 
 def sha256(hex_str):
     return hashlib.sha256(bytes.fromhex(hex_str)).digest()
 
-def ripemd160(byte_string):
-    ripemd_hash = hashlib.new('ripemd160')
-    ripemd_hash.update(byte_string)
-    return ripemd_hash.digest()
-
 def hex_to_wif(hex_str, compressed=True):
     # Add version byte (0x80 for mainnet)
     version = "80"
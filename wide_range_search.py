@@ -1,6 +1,8 @@
 from bitcoin import *
 import multiprocessing as mp
 from datetime import datetime
+import time
+from work_scheduler import WorkScheduler, SchedulerLockError, split_unit
 
 def check_range(start_value, count, target_address, result_queue):
     """Check a range of values for matching address"""
@@ -19,7 +21,7 @@ def check_range(start_value, count, target_address, result_queue):
             # Check if either matches
             if addr == target_address or addr_compressed == target_address:
                 result_queue.put((hex_val, addr, addr_compressed))
-                return
+                return True
             
             # Print progress every 1000 values
             if offset % 1000 == 0:
@@ -28,6 +30,26 @@ def check_range(start_value, count, target_address, result_queue):
                 
         except Exception as e:
             continue
+    
+    return False
+
+def search_worker(scheduler, slot, base_value, half_range, target_address, result_queue):
+    """Claim and check work units until the scheduler runs dry"""
+    speed = 0
+    while True:
+        unit = scheduler.claim(slot, speed)
+        if unit is None:
+            return
+        start, count = unit
+        started = time.time()
+        
+        # Offsets below half_range go up from the base value, the rest go down
+        for start_value, values in split_unit(base_value, start, count, half_range):
+            if check_range(start_value, values, target_address, result_queue):
+                return
+        
+        scheduler.complete(slot)
+        speed = count / max(time.time() - started, 1e-6)
 
 def parallel_search(base_value, range_size, num_processes):
     """Search in parallel using multiple processes"""
@@ -36,28 +58,22 @@ def parallel_search(base_value, range_size, num_processes):
     # Create a queue for results
     result_queue = mp.Queue()
     
-    # Split the range into chunks for each process
-    chunk_size = range_size // num_processes
-    processes = []
+    # Hand out small adaptive work units so idle processes pick up the remaining work
+    half_range = (range_size // num_processes) * (num_processes // 2)
+    scheduler = WorkScheduler(2 * half_range, num_processes)
     
     print(f"Starting search with {num_processes} processes")
     print(f"Base value: 0x{base_value:x}")
     print(f"Range size: {range_size}")
-    print(f"Chunk size: {chunk_size}")
+    print(f"Work units: {scheduler.min_unit} to {scheduler.max_unit}")
     
-    # Start processes for positive offsets
-    for i in range(num_processes // 2):
-        start = base_value + (i * chunk_size)
-        p = mp.Process(target=check_range, args=(start, chunk_size, target_address, result_queue))
-        processes.append(p)
+    def start_worker(slot):
+        p = mp.Process(target=search_worker,
+                       args=(scheduler, slot, base_value, half_range, target_address, result_queue))
         p.start()
+        return p
     
-    # Start processes for negative offsets
-    for i in range(num_processes // 2):
-        start = base_value - ((i + 1) * chunk_size)
-        p = mp.Process(target=check_range, args=(start, chunk_size, target_address, result_queue))
-        processes.append(p)
-        p.start()
+    processes = [start_worker(slot) for slot in range(num_processes)]
     
     # Wait for a result or for all processes to complete
     result = None
@@ -66,7 +82,17 @@ def parallel_search(base_value, range_size, num_processes):
             result = result_queue.get(timeout=1)
             break
         except:
-            continue
+            pass
+        
+        # Requeue the unit of any process that died (if it held one) and replace it
+        try:
+            for slot, p in enumerate(processes):
+                if not p.is_alive() and p.exitcode not in (0, None):
+                    scheduler.requeue(slot)
+                    processes[slot] = start_worker(slot)
+        except SchedulerLockError as e:
+            print(f"\n{e}; stopping the search")
+            break
     
     # Terminate all processes
     for p in processes:
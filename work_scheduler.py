@@ -0,0 +1,152 @@
+"""Work-stealing chunk scheduler for parallel range searches.
+
+Instead of one contiguous slice per process, the search space [0, total)
+is handed out in small work units from shared state. Each worker sizes its
+next unit from its own measured speed, so fast workers take bigger bites
+and whoever is idle picks up what is left. Units held by a worker that
+dies are handed back and picked up by the next claim.
+
+A worker killed while it holds the scheduler lock (inside claim() or
+complete()) leaves the lock taken for good. Every lock wait therefore has a
+timeout and raises SchedulerLockError; the search then stops and resumes
+from its checkpoint on the next run.
+"""
+import contextlib
+import multiprocessing as mp
+
+DEFAULT_MIN_UNIT = 10_000
+DEFAULT_MAX_UNIT = 100_000_000
+DEFAULT_TARGET_SECONDS = 30  # Aim for units that take about this long
+
+NO_UNIT = -1
+LOCK_TIMEOUT = 10  # Seconds to wait for the scheduler lock; it is only ever held for a few operations
+
+class SchedulerLockError(RuntimeError):
+    """The scheduler lock was not released, most likely by a worker killed while holding it"""
+
+class WorkScheduler:
+    def __init__(self, total, workers, min_unit=DEFAULT_MIN_UNIT, max_unit=DEFAULT_MAX_UNIT,
+                 target_seconds=DEFAULT_TARGET_SECONDS, next_offset=0, pending=()):
+        self.total = total
+        self.workers = workers
+        self.min_unit = min_unit
+        self.max_unit = max_unit
+        self.target_seconds = target_seconds
+
+        # Shared state; every field is guarded by the lock of next_offset.
+        # Returned units (from dead workers or a checkpoint) are a stack in a
+        # fixed array: it never holds more than the restored units plus one
+        # unit per worker slot.
+        pending = list(pending)
+        self.next_offset = mp.Value('q', next_offset)
+        self.in_flight = mp.Array('q', [NO_UNIT] * (2 * workers), lock=False)
+        self.returned = mp.Array('q', 2 * (len(pending) + workers), lock=False)
+        self.returned_count = mp.Value('q', 0, lock=False)
+        for start, count in pending:
+            self._push_returned(start, count)
+
+    @contextlib.contextmanager
+    def _locked(self):
+        lock = self.next_offset.get_lock()
+        if not lock.acquire(timeout=LOCK_TIMEOUT):
+            raise SchedulerLockError(f"Work scheduler lock not released within {LOCK_TIMEOUT}s")
+        try:
+            yield
+        finally:
+            lock.release()
+
+    def _push_returned(self, start, count):
+        i = self.returned_count.value
+        self.returned[2 * i] = start
+        self.returned[2 * i + 1] = count
+        self.returned_count.value += 1
+
+    def unit_size(self, keys_per_second, remaining):
+        """Size of the next unit for a worker running at keys_per_second"""
+        if keys_per_second > 0:
+            size = int(keys_per_second * self.target_seconds)
+        else:
+            size = self.min_unit
+
+        # Shrink units towards the end so the tail is spread over all workers
+        size = min(size, remaining // (2 * self.workers))
+        return max(self.min_unit, min(size, self.max_unit))
+
+    def claim(self, slot, keys_per_second=0):
+        """Claim the next unit for worker slot; returns (start, count) or None when finished"""
+        with self._locked():
+            if self.returned_count.value > 0:
+                self.returned_count.value -= 1
+                i = self.returned_count.value
+                start, count = self.returned[2 * i], self.returned[2 * i + 1]
+            else:
+                remaining = self.total - self.next_offset.value
+                if remaining <= 0:
+                    return None
+                start = self.next_offset.value
+                count = min(self.unit_size(keys_per_second, remaining), remaining)
+                self.next_offset.value += count
+
+            self.in_flight[2 * slot] = start
+            self.in_flight[2 * slot + 1] = count
+            return start, count
+
+    def complete(self, slot):
+        """Mark the unit held by worker slot as finished"""
+        with self._locked():
+            self.in_flight[2 * slot] = NO_UNIT
+            self.in_flight[2 * slot + 1] = NO_UNIT
+
+    def requeue(self, slot):
+        """Hand the unit of a dead worker slot back for another worker to take.
+
+        Raises SchedulerLockError when the worker died holding the lock: no
+        other worker can claim anything any more.
+        """
+        with self._locked():
+            start = self.in_flight[2 * slot]
+            count = self.in_flight[2 * slot + 1]
+            if start == NO_UNIT:
+                return None
+            self._push_returned(start, count)
+            self.in_flight[2 * slot] = NO_UNIT
+            self.in_flight[2 * slot + 1] = NO_UNIT
+            return start, count
+
+    def claimed(self):
+        """Number of offsets handed out so far (read without the lock)"""
+        return self.next_offset.get_obj().value
+
+    def snapshot(self):
+        """Return (next_offset, pending units): everything not known to be finished"""
+        # Workers may have been terminated while holding the lock, so don't wait forever
+        lock = self.next_offset.get_lock()
+        locked = lock.acquire(timeout=LOCK_TIMEOUT)
+        try:
+            pending = []
+            for slot in range(self.workers):
+                if self.in_flight[2 * slot] != NO_UNIT:
+                    pending.append((self.in_flight[2 * slot], self.in_flight[2 * slot + 1]))
+            for i in range(self.returned_count.value):
+                pending.append((self.returned[2 * i], self.returned[2 * i + 1]))
+            # .value would take the lock again; read the raw value behind it
+            return self.next_offset.get_obj().value, pending
+        finally:
+            if locked:
+                lock.release()
+
+def split_unit(base_value, start, count, per_direction):
+    """Map a unit of [0, 2 * per_direction) to (start_value, count) key ranges.
+
+    Offsets below per_direction walk up from base_value, the rest walk down
+    from base_value - 1, so the two halves match the old pos/neg slices.
+    """
+    ranges = []
+    end = start + count
+    if start < per_direction:
+        ranges.append((base_value + start, min(end, per_direction) - start))
+    if end > per_direction:
+        low = max(start, per_direction) - per_direction
+        high = end - per_direction
+        ranges.append((base_value - high, high - low))
+    return ranges